@@ -141,13 +141,16 @@ def task(name: Optional[str] = None,
     
     return decorator
 
-def flow(name: Optional[str] = None, description: Optional[str] = None):
+def flow(name: Optional[str] = None, description: Optional[str] = None,
+         edges: Optional[List[List[str]]] = None):
     """
     Dekorator do definiowania przepływu.
     
     Args:
         name: Opcjonalna nazwa przepływu (domyślnie: nazwa funkcji)
         description: Opcjonalny opis przepływu
+        edges: Opcjonalne zależności między zadaniami jako pary [źródło, cel],
+            zapisywane w historii przepływu do wizualizacji
     """
     def decorator(func):
         flow_name = name or func.__name__
@@ -168,29 +171,16 @@ def flow(name: Optional[str] = None, description: Optional[str] = None):
                 "status": FlowStatus.RUNNING,
                 "tasks": [],
             }
+            if edges:
+                flow_info["edges"] = edges
+            
+            # Zapisanie stanu przed wykonaniem
+            initial_history_len = len(FLOW_HISTORY)
             
             # Wykonanie przepływu
             try:
-                # Zapisanie stanu przed wykonaniem
-                initial_history_len = len(FLOW_HISTORY)
-                
                 # Wykonanie funkcji przepływu
                 result = func(*args, **kwargs)
-                
-                # Zebranie informacji o zadaniach wykonanych w przepływie
-                tasks = FLOW_HISTORY[initial_history_len:]
-                flow_info["tasks"] = [task["task_id"] for task in tasks]
-                
-                # Zapisanie informacji o zakończeniu przepływu
-                flow_info["status"] = FlowStatus.COMPLETED
-                flow_info["end_time"] = datetime.now().isoformat()
-                flow_info["duration"] = time.time() - start_time
-                logger.info(f"Zakończenie przepływu: {flow_name} (czas: {flow_info['duration']:.2f}s)")
-                
-                # Zapisanie przepływu do pliku
-                save_flow(flow_info)
-                
-                return result
             except Exception as e:
                 # Zapisanie informacji o błędzie
                 error_msg = str(e)
@@ -202,10 +192,28 @@ def flow(name: Optional[str] = None, description: Optional[str] = None):
                 flow_info["end_time"] = datetime.now().isoformat()
                 flow_info["duration"] = time.time() - start_time
                 
+                # Zadania wykonane przed błędem
+                _record_flow_tasks(flow_info, FLOW_HISTORY[initial_history_len:])
+                
                 # Zapisanie przepływu do pliku
                 save_flow(flow_info)
                 
                 raise
+            
+            # Zebranie informacji o zadaniach wykonanych w przepływie; zapis
+            # poza try, więc błąd zapisu nie oznacza przepływu jako FAILED
+            _record_flow_tasks(flow_info, FLOW_HISTORY[initial_history_len:])
+            
+            # Zapisanie informacji o zakończeniu przepływu
+            flow_info["status"] = FlowStatus.COMPLETED
+            flow_info["end_time"] = datetime.now().isoformat()
+            flow_info["duration"] = time.time() - start_time
+            logger.info(f"Zakończenie przepływu: {flow_name} (czas: {flow_info['duration']:.2f}s)")
+            
+            # Zapisanie przepływu do pliku
+            save_flow(flow_info)
+            
+            return result
         
         return wrapper
     
@@ -224,6 +232,38 @@ def save_flow(flow_info: Dict[str, Any]):
     with open(flow_file, "w") as f:
         json.dump(flow_info, f, indent=2)
 
+def _record_flow_tasks(flow_info: Dict[str, Any], tasks: List[Dict[str, Any]]):
+    """
+    Dołącza zadania do informacji o przepływie i zapisuje ich rekordy.
+    
+    Błąd zapisu rekordów jest tylko logowany: nie zmienia wyniku przepływu.
+    
+    Args:
+        flow_info: Informacje o przepływie
+        tasks: Rekordy zadań z FLOW_HISTORY wykonanych w przepływie
+    """
+    flow_info["tasks"] = [task["task_id"] for task in tasks]
+    try:
+        save_task_records(flow_info["flow_id"], tasks)
+    except (OSError, TypeError, ValueError) as e:
+        logger.error(f"Nie udało się zapisać rekordów zadań przepływu {flow_info['flow_id']}: {str(e)}")
+
+def save_task_records(flow_id: str, tasks: List[Dict[str, Any]]):
+    """
+    Zapisuje rekordy zadań przepływu do jednego pliku JSONL (rekord na linię).
+    
+    Historia przepływu jest wtedy wczytywana jednym odczytem zamiast
+    otwierania osobnego pliku dla każdego zadania.
+    
+    Args:
+        flow_id: Identyfikator przepływu
+        tasks: Rekordy zadań z FLOW_HISTORY
+    """
+    tasks_file = os.path.join(FLOW_DIR, f"{flow_id}.tasks.jsonl")
+    
+    with open(tasks_file, "w") as f:
+        f.writelines(json.dumps(task) + "\n" for task in tasks)
+
 def load_flow(flow_id: str) -> Dict[str, Any]:
     """
     Wczytuje informacje o przepływie z pliku JSON.
@@ -369,7 +409,8 @@ def run_flow_from_dsl(dsl_text: str, input_data: Dict[str, Any] = None) -> Dict[
             raise ValueError(f"Zadanie '{node}' nie jest zarejestrowane")
     
     # Uruchomienie przepływu
-    @flow(name=flow_name, description=flow_def.get("description", ""))
+    @flow(name=flow_name, description=flow_def.get("description", ""),
+          edges=[[conn["source"], conn["target"]] for conn in connections])
     def execute_flow():
         results = {}
         node_outputs = {}
@@ -4,6 +4,7 @@ Taskinity Core - A simple framework for defining workflows using decorators and
 Allows easy connection of functions into flows and monitoring their execution.
 """
 import functools
+import hashlib
 import inspect
 import json
 import logging
@@ -11,10 +12,11 @@ import os
 import re
 import time
 import traceback
+from collections import OrderedDict, deque
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type, Union
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Type, Union
 
 # Logging configuration
 logging.basicConfig(
@@ -44,6 +46,23 @@ REGISTRY = {}
 # Flow execution history
 FLOW_HISTORY = []
 
+# Bumped on every task registration; parsed DSL embeds registry data, so
+# cached parses are only valid for the registry version they were built with
+_REGISTRY_VERSION = 0
+
+# DSL grammar
+_FLOW_RE = re.compile(r"flow\s+(\w+):")
+_DESCRIPTION_RE = re.compile(r'description:\s*"([^"]*)"')
+_CONNECTION_RE = re.compile(r'(\w+)\s*->\s*(\[.*\]|\w+)')
+
+# Parsed DSL keyed by (content digest, registry version), least recently
+# used first
+_DSL_CACHE: "OrderedDict[Tuple[bytes, int], Dict[str, Any]]" = OrderedDict()
+_DSL_CACHE_SIZE = 256
+
+# Last observed duration (seconds) of tasks run from DSL, keyed by registry key
+TASK_DURATIONS: Dict[str, float] = {}
+
 def task(name: Optional[str] = None, 
          description: Optional[str] = None, 
          validate_input: Optional[Callable] = None,
@@ -62,6 +81,8 @@ def task(name: Optional[str] = None,
         task_desc = description or func.__doc__ or ""
         
         # Register function in the global registry
+        global _REGISTRY_VERSION
+        _REGISTRY_VERSION += 1
         REGISTRY[func.__name__] = {
             "name": task_name,
             "description": task_desc,
@@ -264,10 +285,51 @@ def list_flows() -> List[Dict[str, Any]]:
     flows.sort(key=lambda x: x.get("start_time", ""), reverse=True)
     return flows
 
+def _copy_flow_structure(flow_structure: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy a parsed flow structure so callers can't modify the cached one.
+    
+    Args:
+        flow_structure: Flow structure returned by _parse_dsl_text
+    
+    Returns:
+        Independent copy of the flow structure
+    """
+    return {
+        "name": flow_structure["name"],
+        "description": flow_structure["description"],
+        "tasks": {name: dict(info) for name, info in flow_structure["tasks"].items()},
+        "connections": [dict(conn) for conn in flow_structure["connections"]]
+    }
+
 def parse_dsl(dsl_text: str) -> Dict[str, Any]:
     """
     Parse DSL text into a flow structure.
     
+    Parsing is pure, so results are cached by a digest of the DSL text;
+    each call returns its own copy of the cached structure.
+    
+    Args:
+        dsl_text: DSL text
+    
+    Returns:
+        Flow structure
+    """
+    key = (hashlib.blake2b(dsl_text.encode(), digest_size=16).digest(), _REGISTRY_VERSION)
+    flow_structure = _DSL_CACHE.get(key)
+    if flow_structure is None:
+        flow_structure = _parse_dsl_text(dsl_text)
+        _DSL_CACHE[key] = flow_structure
+        if len(_DSL_CACHE) > _DSL_CACHE_SIZE:
+            _DSL_CACHE.popitem(last=False)
+    else:
+        _DSL_CACHE.move_to_end(key)
+    return _copy_flow_structure(flow_structure)
+
+def _parse_dsl_text(dsl_text: str) -> Dict[str, Any]:
+    """
+    Parse DSL text into a flow structure.
+    
     Example DSL:
     ```
     flow EmailProcessing:
@@ -291,47 +353,50 @@ def parse_dsl(dsl_text: str) -> Dict[str, Any]:
         "tasks": {},
         "connections": []
     }
+    connections = flow_structure["connections"]
     
     # Parse flow name
-    flow_match = re.match(r"flow\s+(\w+):", lines[0])
+    flow_match = _FLOW_RE.match(lines[0])
     if flow_match:
         flow_structure["name"] = flow_match.group(1)
     
-    # Parse flow description and connections
+    # Task names in order of first appearance
+    tasks = {}
+    
+    # Parse flow description and connections; the regexes only run on lines
+    # that can match them
     for line in lines[1:]:
         line = line.strip()
         if not line:
             continue
         
         # Description
-        desc_match = re.match(r'\s*description:\s*"([^"]*)"', line)
-        if desc_match:
-            flow_structure["description"] = desc_match.group(1)
-            continue
+        if line.startswith("description"):
+            desc_match = _DESCRIPTION_RE.match(line)
+            if desc_match:
+                flow_structure["description"] = desc_match.group(1)
+                continue
         
         # Connection
-        conn_match = re.match(r'\s*(\w+)\s*->\s*(\[.*\]|\w+)', line)
+        if "->" not in line:
+            continue
+        conn_match = _CONNECTION_RE.match(line)
         if conn_match:
-            source = conn_match.group(1)
-            target_str = conn_match.group(2)
+            source, target_str = conn_match.groups()
             
             # Multiple targets
-            if target_str.startswith("[") and target_str.endswith("]"):
+            if target_str[0] == "[" and target_str[-1] == "]":
                 targets = [t.strip() for t in target_str[1:-1].split(",")]
             else:
                 targets = [target_str]
             
+            tasks[source] = None
             for target in targets:
-                flow_structure["connections"].append({
+                connections.append({
                     "source": source,
                     "target": target
                 })
-    
-    # Build task list
-    tasks = set()
-    for conn in flow_structure["connections"]:
-        tasks.add(conn["source"])
-        tasks.add(conn["target"])
+                tasks[target] = None
     
     # Add task information from registry
     for task_name in tasks:
@@ -349,6 +414,137 @@ def parse_dsl(dsl_text: str) -> Dict[str, Any]:
     
     return flow_structure
 
+class _CompiledTask(NamedTuple):
+    """Registry data of a task, resolved once per flow."""
+    function: Callable
+    params: Tuple[str, ...]
+    module: str
+
+@functools.lru_cache(maxsize=256)
+def _compile_tasks(task_names: Tuple[str, ...], registry_version: int) -> Dict[str, _CompiledTask]:
+    """
+    Resolve the function, parameter names and module of every task in a flow.
+    
+    The run loop then reads plain tuples instead of looking up the registry
+    entry and inspecting the signature for every executed task.
+    
+    Args:
+        task_names: Names of the registered tasks in the flow
+        registry_version: Registry version the result is valid for (part of
+            the cache key)
+    
+    Returns:
+        Compiled tasks keyed by task name
+    """
+    compiled = {}
+    for task_name in task_names:
+        info = REGISTRY[task_name]
+        function = info["function"]
+        compiled[task_name] = _CompiledTask(
+            function, tuple(info["signature"].parameters), function.__module__
+        )
+    return compiled
+
+def _prepare_task_kwargs(params: Tuple[str, ...], deps: List[str], results: Dict[str, Any],
+                         input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build keyword arguments for a task from input data and dependency results.
+    
+    Args:
+        params: Parameter names of the task function
+        deps: Names of the tasks this task depends on
+        results: Results of already executed tasks
+        input_data: Input data for the flow
+    
+    Returns:
+        Keyword arguments for the task function
+    """
+    kwargs = {}
+    for param_name in params:
+        # Check if parameter is in input data
+        if param_name in input_data:
+            kwargs[param_name] = input_data[param_name]
+        
+        # Check if parameter is in results of dependencies
+        for dep in deps:
+            if dep in results:
+                # If dependency result is a dictionary, check for matching keys
+                if isinstance(results[dep], dict) and param_name in results[dep]:
+                    kwargs[param_name] = results[dep][param_name]
+                # If parameter name matches dependency name, use dependency result
+                elif param_name == dep:
+                    kwargs[param_name] = results[dep]
+    return kwargs
+
+def _pop_nearest_task(ready: deque, previous: Optional[str], tasks: Dict[str, _CompiledTask]) -> str:
+    """
+    Take the ready task that is cheapest to run after the previous one.
+    
+    Switching to a task from the same module as the previous task is free
+    (its imports and globals are already warm), any other switch costs the
+    same, so the first same-module task wins and ties keep queue order.
+    
+    Args:
+        ready: Queue of tasks whose dependencies have finished
+        previous: Name of the last executed task (None before the first)
+        tasks: Compiled tasks of the flow
+    
+    Returns:
+        Name of the task to run next (removed from the queue)
+    """
+    if previous is not None and len(ready) > 1:
+        module = tasks[previous].module
+        for index, name in enumerate(ready):
+            if tasks[name].module == module:
+                del ready[index]
+                return name
+    return ready.popleft()
+
+@functools.lru_cache(maxsize=256)
+def _execution_plan(graph: Tuple[Tuple[str, Tuple[str, ...]], ...],
+                    registry_version: int) -> Tuple[Tuple[str, Callable, Tuple[str, ...], Tuple[str, ...]], ...]:
+    """
+    Plan the sequential execution order of a flow.
+    
+    Tasks are ordered topologically: a task becomes ready as soon as its
+    last dependency is planned, and among ready tasks the cheapest switch
+    from the previous task is taken (see _pop_nearest_task).
+    
+    Args:
+        graph: Pairs of (task name, names of its dependencies)
+        registry_version: Registry version the plan is valid for (part of
+            the cache key)
+    
+    Returns:
+        Steps of (task name, function, parameter names, dependencies); tasks
+        on a dependency cycle are left out
+    """
+    dependencies = dict(graph)
+    tasks = _compile_tasks(tuple(dependencies), registry_version)
+    
+    # Successors and unplanned-dependency counts of every task
+    successors = {task_name: [] for task_name in dependencies}
+    in_degree = {}
+    for task_name, deps in dependencies.items():
+        in_degree[task_name] = len(deps)
+        for dep in deps:
+            successors[dep].append(task_name)
+    
+    plan = []
+    ready = deque(task_name for task_name, degree in in_degree.items() if degree == 0)
+    task_name = None
+    while ready:
+        task_name = _pop_nearest_task(ready, task_name, tasks)
+        function, params, _ = tasks[task_name]
+        plan.append((task_name, function, params, dependencies[task_name]))
+        
+        for successor in successors[task_name]:
+            in_degree[successor] -= 1
+            if in_degree[successor] == 0:
+                ready.append(successor)
+    
+    return tuple(plan)
+
 def run_flow_from_dsl(dsl_text: str, input_data: Dict[str, Any] = None, executor=None) -> Any:
     """
     Run a flow defined in DSL.
@@ -380,6 +576,7 @@ def run_flow_from_dsl(dsl_text: str, input_data: Dict[str, Any] = None, executor
         "status": FlowStatus.RUNNING,
         "input_data": str(input_data),
         "tasks": [],
+        "edges": [[conn["source"], conn["target"]] for conn in flow_structure["connections"]],
         "dsl": dsl_text
     }
     
@@ -441,26 +638,26 @@ def run_flow_from_dsl(dsl_text: str, input_data: Dict[str, Any] = None, executor
             save_flow(flow_info)
             raise ValueError(error_msg)
         
-        # Execute entry points with input data
-        for entry_point in entry_points:
-            task_func = REGISTRY[entry_point]["function"]
-            sig = REGISTRY[entry_point]["signature"]
-            
-            # Prepare arguments
-            kwargs = {}
-            for param_name, param in sig.parameters.items():
-                if param_name in input_data:
-                    kwargs[param_name] = input_data[param_name]
+        # The execution order only depends on the graph, so it is planned
+        # once per flow shape and replayed as a flat sequence
+        plan = _execution_plan(
+            tuple((task_name, tuple(deps)) for task_name, deps in dependencies.items()),
+            _REGISTRY_VERSION
+        )
+        for task_name, task_func, params, deps in plan:
+            kwargs = _prepare_task_kwargs(params, deps, results, input_data)
             
             # Execute task
             try:
-                results[entry_point] = task_func(**kwargs)
+                task_start = time.perf_counter()
+                results[task_name] = task_func(**kwargs)
+                TASK_DURATIONS[task_name] = time.perf_counter() - task_start
             except Exception as e:
-                logger.error(f"Error executing task {entry_point}: {str(e)}")
+                logger.error(f"Error executing task {task_name}: {str(e)}")
                 
                 # Save information about flow failure
                 flow_info["status"] = FlowStatus.FAILED
-                flow_info["error"] = f"Error executing task {entry_point}: {str(e)}"
+                flow_info["error"] = f"Error executing task {task_name}: {str(e)}"
                 flow_info["traceback"] = traceback.format_exc()
                 flow_info["end_time"] = datetime.now().isoformat()
                 flow_info["duration"] = (
@@ -478,91 +675,29 @@ def run_flow_from_dsl(dsl_text: str, input_data: Dict[str, Any] = None, executor
                 save_flow(flow_info)
                 raise
         
-        # Remove entry points from dependencies
-        for entry_point in entry_points:
-            del dependencies[entry_point]
-        
-        # Execute remaining tasks in topological order
-        while dependencies:
-            # Find tasks whose dependencies are all executed
-            executable_tasks = []
-            for task_name, deps in list(dependencies.items()):
-                if all(dep in results for dep in deps):
-                    executable_tasks.append(task_name)
+        # Tasks that never became ready are part of a cycle
+        if len(results) < len(dependencies):
+            error_msg = "Circular dependency detected or missing tasks"
+            logger.error(error_msg)
             
-            if not executable_tasks:
-                error_msg = "Circular dependency detected or missing tasks"
-                logger.error(error_msg)
-                
-                # Save information about flow failure
-                flow_info["status"] = FlowStatus.FAILED
-                flow_info["error"] = error_msg
-                flow_info["end_time"] = datetime.now().isoformat()
-                flow_info["duration"] = (
-                    datetime.fromisoformat(flow_info["end_time"]) - 
-                    datetime.fromisoformat(flow_info["start_time"])
-                ).total_seconds()
-                
-                # Save flow tasks
-                flow_info["tasks"] = [
-                    task for task in FLOW_HISTORY 
-                    if "start_time" in task and 
-                    datetime.fromisoformat(task["start_time"]) >= datetime.fromisoformat(flow_info["start_time"])
-                ]
-                
-                save_flow(flow_info)
-                raise ValueError(error_msg)
+            # Save information about flow failure
+            flow_info["status"] = FlowStatus.FAILED
+            flow_info["error"] = error_msg
+            flow_info["end_time"] = datetime.now().isoformat()
+            flow_info["duration"] = (
+                datetime.fromisoformat(flow_info["end_time"]) - 
+                datetime.fromisoformat(flow_info["start_time"])
+            ).total_seconds()
             
-            # Execute tasks
-            for task_name in executable_tasks:
-                task_func = REGISTRY[task_name]["function"]
-                sig = REGISTRY[task_name]["signature"]
-                
-                # Prepare arguments
-                kwargs = {}
-                for param_name, param in sig.parameters.items():
-                    # Check if parameter is in input data
-                    if param_name in input_data:
-                        kwargs[param_name] = input_data[param_name]
-                    
-                    # Check if parameter is in results of dependencies
-                    for dep in dependencies[task_name]:
-                        if dep in results:
-                            # If dependency result is a dictionary, check for matching keys
-                            if isinstance(results[dep], dict) and param_name in results[dep]:
-                                kwargs[param_name] = results[dep][param_name]
-                            # If parameter name matches dependency name, use dependency result
-                            elif param_name == dep:
-                                kwargs[param_name] = results[dep]
-                
-                # Execute task
-                try:
-                    results[task_name] = task_func(**kwargs)
-                except Exception as e:
-                    logger.error(f"Error executing task {task_name}: {str(e)}")
-                    
-                    # Save information about flow failure
-                    flow_info["status"] = FlowStatus.FAILED
-                    flow_info["error"] = f"Error executing task {task_name}: {str(e)}"
-                    flow_info["traceback"] = traceback.format_exc()
-                    flow_info["end_time"] = datetime.now().isoformat()
-                    flow_info["duration"] = (
-                        datetime.fromisoformat(flow_info["end_time"]) - 
-                        datetime.fromisoformat(flow_info["start_time"])
-                    ).total_seconds()
-                    
-                    # Save flow tasks
-                    flow_info["tasks"] = [
-                        task for task in FLOW_HISTORY 
-                        if "start_time" in task and 
-                        datetime.fromisoformat(task["start_time"]) >= datetime.fromisoformat(flow_info["start_time"])
-                    ]
-                    
-                    save_flow(flow_info)
-                    raise
-                
-                # Remove task from dependencies
-                del dependencies[task_name]
+            # Save flow tasks
+            flow_info["tasks"] = [
+                task for task in FLOW_HISTORY 
+                if "start_time" in task and 
+                datetime.fromisoformat(task["start_time"]) >= datetime.fromisoformat(flow_info["start_time"])
+            ]
+            
+            save_flow(flow_info)
+            raise ValueError(error_msg)
         
         # Save information about flow completion
         flow_info["status"] = FlowStatus.COMPLETED
@@ -592,7 +727,7 @@ def run_flow_from_dsl(dsl_text: str, input_data: Dict[str, Any] = None, executor
     if executor:
         # If an executor is provided, use it for parallel execution
         from taskinity.parallel_executor import run_parallel_flow
-        return run_parallel_flow(flow_structure, input_data, executor)
+        return run_parallel_flow(flow_structure, input_data, executor, flow_info)
     else:
         # Otherwise, execute sequentially
         return execute_flow()
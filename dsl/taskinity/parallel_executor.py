@@ -8,7 +8,10 @@ import json
 import time
 import logging
 import threading
+import traceback
 import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
 from queue import Queue
 from typing import Dict, List, Any, Optional, Callable, Set, Tuple
 from pathlib import Path
@@ -321,6 +324,179 @@ class ParallelFlowExecutor:
         finally:
             logger.removeHandler(file_handler)
 
+def _finish_flow(flow_info: Dict[str, Any], status: str, task_status: Dict[str, str],
+                 error: Optional[str] = None, error_traceback: Optional[str] = None) -> None:
+    """
+    Uzupełnia rekord przepływu z run_flow_from_dsl o wynik i zapisuje go.
+    
+    Args:
+        flow_info: Rekord przepływu
+        status: Końcowy status przepływu
+        task_status: Statusy zadań (nazwa -> status)
+        error: Opis błędu (opcjonalnie)
+        error_traceback: Traceback błędu (opcjonalnie)
+    """
+    from taskinity.core import taskinity_core as core
+    
+    flow_info["status"] = status
+    if error is not None:
+        flow_info["error"] = error
+    if error_traceback is not None:
+        flow_info["traceback"] = error_traceback
+    flow_info["end_time"] = datetime.now().isoformat()
+    flow_info["duration"] = (
+        datetime.fromisoformat(flow_info["end_time"]) - 
+        datetime.fromisoformat(flow_info["start_time"])
+    ).total_seconds()
+    
+    # Zadania zapisane w historii od startu przepływu, tak jak przy
+    # wykonaniu sekwencyjnym, oraz statusy wszystkich zadań z DSL
+    flow_info["tasks"] = [
+        task for task in core.FLOW_HISTORY 
+        if "start_time" in task and 
+        datetime.fromisoformat(task["start_time"]) >= datetime.fromisoformat(flow_info["start_time"])
+    ]
+    flow_info["task_status"] = dict(task_status)
+    
+    core.save_flow(flow_info)
+
+def run_parallel_flow(flow_structure: Dict[str, Any], input_data: Dict[str, Any], executor,
+                      flow_info: Dict[str, Any]) -> Any:
+    """
+    Wykonuje przepływ z parse_dsl na podanym executorze (concurrent.futures).
+    
+    Niezależne gałęzie są wysyłane do puli wszerz (BFS), a łańcuchy zadań
+    wykonywane są w głąb (DFS) w jednym wątku: jeśli zadanie ma dokładnie
+    jeden następnik, który nie zależy od niczego innego, następnik jest
+    uruchamiany od razu w tym samym wątku zamiast wracać do kolejki.
+    
+    Błąd zadania oznacza je jako FAILED, a wszystkie zadania od niego zależne
+    jako SKIPPED; niezależne gałęzie są wykonywane do końca. Status, czas
+    i statusy zadań zapisywane są w rekordzie przepływu przez save_flow.
+    
+    Args:
+        flow_structure: Struktura przepływu zwrócona przez parse_dsl
+        input_data: Dane wejściowe dla przepływu
+        executor: Executor z metodą submit (np. ThreadPoolExecutor)
+        flow_info: Rekord przepływu utworzony przez run_flow_from_dsl
+        
+    Returns:
+        Wynik ostatniego zadania w kolejności wykonania sekwencyjnego (ten sam,
+        który zwraca run_flow_from_dsl bez executora)
+        
+    Raises:
+        ValueError: Gdy przepływ nie ma punktów wejścia lub zawiera cykl
+        Exception: Pierwszy błąd zgłoszony przez zadanie
+    """
+    from taskinity.core import taskinity_core as core
+    
+    tasks = core._compile_tasks(tuple(flow_structure["tasks"]), core._REGISTRY_VERSION)
+    predecessors = {name: [] for name in flow_structure["tasks"]}
+    successors = {name: [] for name in flow_structure["tasks"]}
+    for conn in flow_structure["connections"]:
+        predecessors[conn["target"]].append(conn["source"])
+        successors[conn["source"]].append(conn["target"])
+    in_degree = {name: len(deps) for name, deps in predecessors.items()}
+    task_status = {name: core.FlowStatus.PENDING for name in flow_structure["tasks"]}
+    
+    # Kolejność rozgałęzień (fork) ustalana jest raz, przed startem: gałęzie
+    # zwalniane przez to samo zadanie startują od najdłuższej (wg czasów
+    # z poprzednich uruchomień), więc nie trzeba jej wyznaczać w trakcie
+    def by_duration(name: str) -> float:
+        return -core.TASK_DURATIONS.get(name, 0.0)
+    for following in successors.values():
+        following.sort(key=by_duration)
+    
+    results = {}
+    
+    def run_chain(name: str) -> Tuple[List[str], Optional[Tuple[str, Exception, str]]]:
+        # Wykonuje zadanie i jego jednoznaczne następniki w tym samym wątku;
+        # zwraca wykonane zadania i ewentualny błąd (zadanie, wyjątek, traceback)
+        chain = []
+        while True:
+            function, params, _ = tasks[name]
+            kwargs = core._prepare_task_kwargs(params, predecessors[name], results, input_data)
+            task_status[name] = core.FlowStatus.RUNNING
+            start = time.perf_counter()
+            try:
+                results[name] = function(**kwargs)
+            except Exception as e:
+                task_status[name] = core.FlowStatus.FAILED
+                logger.error(f"Błąd w zadaniu {name}: {str(e)}")
+                return chain, (name, e, traceback.format_exc())
+            core.TASK_DURATIONS[name] = time.perf_counter() - start
+            task_status[name] = core.FlowStatus.COMPLETED
+            chain.append(name)
+            
+            following = successors[name]
+            if len(following) == 1 and len(predecessors[following[0]]) == 1:
+                name = following[0]
+            else:
+                return chain, None
+    
+    def skip_dependents(name: str) -> None:
+        # Zadania zależne (także pośrednio) od nieudanego zadania nigdy nie
+        # staną się gotowe
+        stack = list(successors[name])
+        while stack:
+            dependent = stack.pop()
+            if task_status[dependent] == core.FlowStatus.PENDING:
+                task_status[dependent] = core.FlowStatus.SKIPPED
+                logger.info(f"Zadanie {dependent} pominięte z powodu błędu w zależności")
+                stack.extend(successors[dependent])
+    
+    ready = deque(sorted((name for name, degree in in_degree.items() if degree == 0), key=by_duration))
+    if not ready:
+        error_msg = "No entry points found in the flow"
+        logger.error(error_msg)
+        _finish_flow(flow_info, core.FlowStatus.FAILED, task_status, error_msg)
+        raise ValueError(error_msg)
+    
+    failures = []
+    pending = {}
+    while ready or pending:
+        while ready:
+            name = ready.popleft()
+            pending[executor.submit(run_chain, name)] = name
+        
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            del pending[future]
+            chain, failure = future.result()
+            if failure is not None:
+                failures.append(failure)
+                skip_dependents(failure[0])
+                continue
+            
+            # Wewnętrzne zadania łańcucha mają jedynie następnika z łańcucha
+            for successor in successors[chain[-1]]:
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    ready.append(successor)
+    
+    if failures:
+        name, error, error_traceback = failures[0]
+        _finish_flow(flow_info, core.FlowStatus.FAILED, task_status,
+                     f"Error executing task {name}: {str(error)}", error_traceback)
+        raise error
+    
+    # Zadania, które nigdy nie stały się gotowe, leżą na cyklu
+    if any(status == core.FlowStatus.PENDING for status in task_status.values()):
+        error_msg = "Circular dependency detected or missing tasks"
+        logger.error(error_msg)
+        _finish_flow(flow_info, core.FlowStatus.FAILED, task_status, error_msg)
+        raise ValueError(error_msg)
+    
+    _finish_flow(flow_info, core.FlowStatus.COMPLETED, task_status)
+    logger.info(f"Przepływ {flow_info['name']} zakończony pomyślnie (czas: {flow_info['duration']:.2f}s)")
+    
+    # Wynik zależy tylko od grafu, a nie od kolejności kończenia się gałęzi
+    plan = core._execution_plan(
+        tuple((name, tuple(deps)) for name, deps in predecessors.items()),
+        core._REGISTRY_VERSION
+    )
+    return results[plan[-1][0]]
+
 def build_flow_from_dsl(dsl_definition: Dict[str, Any], task_registry: Dict[str, Callable]) -> ParallelFlowExecutor:
     """
     Buduje przepływ na podstawie definicji DSL.
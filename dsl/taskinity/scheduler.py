@@ -8,6 +8,7 @@ import datetime
 import json
 import logging
 import os
+import sqlite3
 import threading
 import time
 from enum import Enum
@@ -20,6 +21,18 @@ try:
 except ImportError:
     SCHEDULE_AVAILABLE = False
 
+# Day name -> datetime.weekday() index for weekly schedules
+_WEEKDAY = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6
+}
+
+_encode_json = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    """Serialize schedule data to the compact JSON bytes stored in the database."""
+    return _encode_json(data).encode("utf-8")
 
 class ScheduleType(Enum):
     """Types of schedules supported by the scheduler."""
@@ -41,7 +54,7 @@ class TaskScheduler:
         Initialize the task scheduler.
         
         Args:
-            storage_dir: Directory to store schedule definitions
+            storage_dir: Directory holding the schedule database (schedules.db)
             logger: Logger instance (optional)
         """
         if not SCHEDULE_AVAILABLE:
@@ -50,68 +63,143 @@ class TaskScheduler:
         
         self.logger = logger or logging.getLogger(__name__)
         self.storage_dir = storage_dir
+        self.db_path = os.path.join(storage_dir, "schedules.db")
         self.schedules = {}
         self.running = False
         self.thread = None
+        self._wake = threading.Event()
+        
+        # Bulk mode defers saves to a single transaction (see _flush_schedules)
+        self._bulk = False
+        self._dirty = set()
+        
+        # Flow runners, bound once on first use (see _bind_flow_runner)
+        self._run_flow = None
+        self._load_dsl = None
         
         # Create storage directory if it doesn't exist
         os.makedirs(storage_dir, exist_ok=True)
         
+        # All schedules live in a single SQLite file; jobs save from the
+        # scheduler thread, so the connection is shared behind a lock
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL journal: each save appends to the log instead of rewriting the
+        # database file, and NORMAL sync skips the per-commit fsync
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS schedules (id TEXT PRIMARY KEY, json BLOB NOT NULL)"
+        )
+        self._db.commit()
+        
         # Load existing schedules
         self._load_schedules()
     
     def _load_schedules(self) -> None:
-        """Load existing schedules from storage directory."""
-        self.logger.info(f"Loading schedules from {self.storage_dir}")
+        """Load existing schedules from the schedule database."""
+        self.logger.info(f"Loading schedules from {self.db_path}")
+        
+        with self._db_lock:
+            rows = self._db.execute("SELECT id, json FROM schedules").fetchall()
+        
+        for schedule_id, body in rows:
+            try:
+                self.schedules[schedule_id] = json.loads(body)
+                self.logger.info(f"Loaded schedule {schedule_id}")
+            
+            except Exception as e:
+                self.logger.error(f"Error loading schedule {schedule_id}: {str(e)}")
         
-        schedule_files = Path(self.storage_dir).glob("*.json")
-        for file_path in schedule_files:
+        self._migrate_schedule_files()
+    
+    def _migrate_schedule_files(self) -> None:
+        """Import legacy per-schedule JSON files into the schedule database."""
+        for file_path in Path(self.storage_dir).glob("*.json"):
+            schedule_id = file_path.stem
             try:
                 with open(file_path, "r") as f:
                     schedule_data = json.load(f)
                 
-                schedule_id = file_path.stem
-                self.schedules[schedule_id] = schedule_data
-                self.logger.info(f"Loaded schedule {schedule_id}")
+                if schedule_id not in self.schedules:
+                    self.schedules[schedule_id] = schedule_data
+                    self._save_schedule(schedule_id, schedule_data)
+                
+                file_path.unlink()
+                self.logger.info(f"Migrated schedule file for {schedule_id}")
             
             except Exception as e:
-                self.logger.error(f"Error loading schedule from {file_path}: {str(e)}")
+                self.logger.error(f"Error migrating schedule from {file_path}: {str(e)}")
     
     def _save_schedule(self, schedule_id: str, schedule_data: Dict[str, Any]) -> None:
         """
-        Save schedule to storage directory.
+        Save schedule to the schedule database.
+        
+        While a bulk operation is in progress the schedule is only marked
+        dirty and written by the next _flush_schedules call.
         
         Args:
             schedule_id: Schedule ID
             schedule_data: Schedule data
         """
-        file_path = Path(self.storage_dir) / f"{schedule_id}.json"
+        if self._bulk:
+            self._dirty.add(schedule_id)
+            return
+        
+        self._write_schedules({schedule_id: schedule_data})
+    
+    def _flush_schedules(self) -> None:
+        """Write all schedules marked dirty during a bulk operation."""
+        dirty, self._dirty = self._dirty, set()
+        self._write_schedules({
+            schedule_id: self.schedules[schedule_id]
+            for schedule_id in dirty
+            if schedule_id in self.schedules
+        })
+    
+    def _write_schedules(self, schedules: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Write schedules to the schedule database in one transaction.
+        
+        Args:
+            schedules: Mapping of schedule ID to schedule data
+        """
+        if not schedules:
+            return
         
         try:
-            with open(file_path, "w") as f:
-                json.dump(schedule_data, f, indent=2)
+            rows = [
+                (schedule_id, _dumps(schedule_data))
+                for schedule_id, schedule_data in schedules.items()
+            ]
             
-            self.logger.info(f"Saved schedule {schedule_id}")
+            with self._db_lock, self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO schedules (id, json) VALUES (?, ?)",
+                    rows
+                )
+            
+            for schedule_id in schedules:
+                self.logger.info(f"Saved schedule {schedule_id}")
         
         except Exception as e:
-            self.logger.error(f"Error saving schedule {schedule_id}: {str(e)}")
+            self.logger.error(f"Error saving schedules {', '.join(schedules)}: {str(e)}")
     
-    def _delete_schedule_file(self, schedule_id: str) -> None:
+    def _delete_schedule_record(self, schedule_id: str) -> None:
         """
-        Delete schedule file from storage directory.
+        Delete schedule record from the schedule database.
         
         Args:
             schedule_id: Schedule ID
         """
-        file_path = Path(self.storage_dir) / f"{schedule_id}.json"
-        
         try:
-            if file_path.exists():
-                file_path.unlink()
-                self.logger.info(f"Deleted schedule file for {schedule_id}")
+            with self._db_lock, self._db:
+                self._db.execute("DELETE FROM schedules WHERE id = ?", (schedule_id,))
+            
+            self.logger.info(f"Deleted schedule record for {schedule_id}")
         
         except Exception as e:
-            self.logger.error(f"Error deleting schedule file for {schedule_id}: {str(e)}")
+            self.logger.error(f"Error deleting schedule record for {schedule_id}: {str(e)}")
     
     def create_schedule(
         self,
@@ -165,6 +253,7 @@ class TaskScheduler:
         # Register schedule if scheduler is running
         if self.running:
             self._register_schedule(schedule_id, schedule_data)
+            self._wake.set()
         
         self.logger.info(f"Created schedule {schedule_id}")
         return schedule_id
@@ -195,6 +284,10 @@ class TaskScheduler:
             raise ValueError(f"Schedule not found: {schedule_id}")
         
         schedule_data = self.schedules[schedule_id]
+        changed = any(
+            value is not None
+            for value in (schedule_type, schedule_params, input_data, name, description, enabled)
+        )
         
         # Update schedule data
         if schedule_type is not None:
@@ -217,8 +310,9 @@ class TaskScheduler:
         
         schedule_data["updated_at"] = datetime.datetime.now().isoformat()
         
-        # Save schedule
-        self._save_schedule(schedule_id, schedule_data)
+        # Save schedule; a bare touch only bumps updated_at in memory
+        if changed:
+            self._save_schedule(schedule_id, schedule_data)
         
         # Re-register schedule if scheduler is running
         if self.running:
@@ -228,6 +322,7 @@ class TaskScheduler:
             # Register schedule if enabled
             if schedule_data.get("enabled", True):
                 self._register_schedule(schedule_id, schedule_data)
+            self._wake.set()
         
         self.logger.info(f"Updated schedule {schedule_id}")
     
@@ -244,10 +339,11 @@ class TaskScheduler:
         # Clear schedule if scheduler is running
         if self.running:
             schedule.clear(schedule_id)
+            self._wake.set()
         
         # Delete schedule
         del self.schedules[schedule_id]
-        self._delete_schedule_file(schedule_id)
+        self._delete_schedule_record(schedule_id)
         
         self.logger.info(f"Deleted schedule {schedule_id}")
     
@@ -293,18 +389,18 @@ class TaskScheduler:
         
         schedule_data = self.schedules[schedule_id]
         
-        # Import here to avoid circular imports
-        from taskinity import run_flow_from_dsl, load_dsl
+        if self._run_flow is None:
+            self._bind_flow_runner()
         
         # Load flow DSL
         flow_path = schedule_data["flow_path"]
-        flow_dsl = load_dsl(flow_path)
+        flow_dsl = self._load_dsl(flow_path)
         
         # Run flow
         self.logger.info(f"Running schedule {schedule_id}")
         
         try:
-            result = run_flow_from_dsl(flow_dsl, schedule_data["input_data"])
+            result = self._run_flow(flow_dsl, schedule_data["input_data"])
             
             # Update last run time
             schedule_data["last_run"] = datetime.datetime.now().isoformat()
@@ -316,6 +412,14 @@ class TaskScheduler:
             self.logger.error(f"Error running schedule {schedule_id}: {str(e)}")
             raise
     
+    def _bind_flow_runner(self) -> None:
+        """Bind the flow runner functions so jobs don't re-import them per run."""
+        # Import here to avoid circular imports
+        from taskinity import run_flow_from_dsl, load_dsl
+        
+        self._run_flow = run_flow_from_dsl
+        self._load_dsl = load_dsl
+    
     def start(self) -> None:
         """Start the scheduler."""
         if self.running:
@@ -323,14 +427,21 @@ class TaskScheduler:
             return
         
         self.logger.info("Starting scheduler")
+        self._bind_flow_runner()
         
-        # Register all enabled schedules
-        for schedule_id, schedule_data in self.schedules.items():
-            if schedule_data.get("enabled", True):
-                self._register_schedule(schedule_id, schedule_data)
+        # Register all enabled schedules, persisting them in one batch
+        self._bulk = True
+        try:
+            for schedule_id, schedule_data in self.schedules.items():
+                if schedule_data.get("enabled", True):
+                    self._register_schedule(schedule_id, schedule_data)
+        finally:
+            self._bulk = False
+            self._flush_schedules()
         
         # Start scheduler in a separate thread
         self.running = True
+        self._wake.clear()
         self.thread = threading.Thread(target=self._run_scheduler)
         self.thread.daemon = True
         self.thread.start()
@@ -348,6 +459,7 @@ class TaskScheduler:
         
         # Stop scheduler
         self.running = False
+        self._wake.set()
         
         # Wait for thread to finish
         if self.thread:
@@ -358,7 +470,12 @@ class TaskScheduler:
         """Run the scheduler loop."""
         while self.running:
             schedule.run_pending()
-            time.sleep(1)
+            
+            # Sleep until the next job is due; schedule changes and stop()
+            # set the wake event so the loop re-evaluates immediately
+            delay = schedule.idle_seconds()
+            self._wake.wait(timeout=None if delay is None else max(0, delay))
+            self._wake.clear()
     
     def _register_schedule(self, schedule_id: str, schedule_data: Dict[str, Any]) -> None:
         """
@@ -401,18 +518,17 @@ class TaskScheduler:
             schedule_data["next_run"] = next_run.isoformat()
         
         elif schedule_type == ScheduleType.WEEKLY.value:
-            day = schedule_params.get("day", "monday")
+            day = schedule_params.get("day", "monday").lower()
             time_str = schedule_params.get("time", "00:00")
             
             # Get day of week method
-            day_method = getattr(schedule.every(), day.lower())
+            day_method = getattr(schedule.every(), day)
             job_schedule = day_method.at(time_str)
             job_schedule.do(job).tag(schedule_id)
             
             # Calculate next run time
             hour, minute = map(int, time_str.split(":"))
-            weekday = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
-                      "friday": 4, "saturday": 5, "sunday": 6}[day.lower()]
+            weekday = _WEEKDAY[day]
             
             next_run = datetime.datetime.now().replace(hour=hour, minute=minute)
             days_ahead = weekday - next_run.weekday()
@@ -6,11 +6,21 @@ import os
 import json
 import time
 import logging
+import bisect
+import functools
 import hashlib
+import secrets
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Union, Callable
 from datetime import datetime
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Konfiguracja loggera
 logging.basicConfig(
     level=logging.INFO,
@@ -18,29 +28,145 @@ logging.basicConfig(
 )
 logger = logging.getLogger("taskinity.utils")
 
+# Wspólny formatter dla handlerów tworzonych przez setup_logger
+_DEFAULT_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
 # Ścieżki do katalogów
 BASE_DIR = Path(__file__).parent.parent
 CACHE_DIR = BASE_DIR / "cache"
 LOGS_DIR = BASE_DIR / "logs"
 
-# Upewniamy się, że katalogi istnieją
-os.makedirs(CACHE_DIR, exist_ok=True)
-os.makedirs(LOGS_DIR, exist_ok=True)
+# Katalogi już utworzone przez _ensure_dir
+_KNOWN_DIRS = set()
+
+
+def _ensure_dir(path: Union[str, Path]) -> None:
+    """
+    Tworzy katalog przy pierwszym użyciu, bez ponownych wywołań systemowych.
+    
+    Args:
+        path: Ścieżka do katalogu
+    """
+    path = str(path)
+    if path not in _KNOWN_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _KNOWN_DIRS.add(path)
+
+def _dumps_bytes(data: Any, indent: Optional[int] = None) -> Optional[bytes]:
+    """
+    Serializuje dane do bajtów JSON przez orjson, jeśli jest dostępny.
+    
+    Args:
+        data: Dane do serializacji
+        indent: Wcięcie JSON (orjson obsługuje tylko brak wcięcia lub 2)
+        
+    Returns:
+        Bajty JSON lub None, jeśli trzeba użyć modułu json
+    """
+    if not ORJSON_AVAILABLE or indent not in (None, 2):
+        return None
+    
+    try:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    except TypeError:
+        # Typy nieobsługiwane przez orjson (np. klucze niebędące napisami)
+        return None
+
+
+def _loads_bytes(data: bytes) -> Any:
+    """
+    Parsuje bajty JSON bez pośredniego dekodowania do str.
+    
+    Args:
+        data: Bajty JSON
+        
+    Returns:
+        Sparsowane dane
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            # np. NaN/Infinity, akceptowane tylko przez moduł json
+            pass
+    
+    return json.loads(data)
+
+
+# Bufor w pamięci procesu przed buforem plikowym: plik -> (znacznik czasu,
+# zawartość pliku bufora). Oszczędza jedynie sprawdzenie i odczyt pliku:
+# przechowywane są bajty, a nie obiekt wyniku, więc każde trafienie nadal
+# parsuje JSON i zwraca nową kopię, taką samą jak przy odczycie z pliku.
+# Kopiowanie zdekodowanego wyniku (copy.deepcopy) jest kilkukrotnie
+# wolniejsze od ponownego parsowania, zwłaszcza przez orjson
+_MEM_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_MEM_CACHE_SIZE = 1024
+
+
+def _mem_cache_get(key: str, ttl: int) -> tuple:
+    """
+    Zwraca (True, wynik) dla świeżego wpisu bufora w pamięci, inaczej (False, None).
+    
+    Wynik jest parsowany z zapisanych bajtów przy każdym trafieniu.
+    """
+    entry = _MEM_CACHE.get(key)
+    if entry is None:
+        return False, None
+    
+    timestamp, payload = entry
+    if time.time() - timestamp > ttl:
+        del _MEM_CACHE[key]
+        return False, None
+    
+    _MEM_CACHE.move_to_end(key)
+    return True, _loads_bytes(payload).get("result")
+
 
+def _mem_cache_put(key: str, timestamp: float, payload: bytes) -> None:
+    """Zapisuje zawartość pliku bufora w pamięci, usuwając najdawniej używane wpisy."""
+    _MEM_CACHE[key] = (timestamp, payload)
+    _MEM_CACHE.move_to_end(key)
+    while len(_MEM_CACHE) > _MEM_CACHE_SIZE:
+        _MEM_CACHE.popitem(last=False)
 
-def generate_id(prefix: str = "task") -> str:
+
+# PID procesu w postaci szesnastkowej, odświeżany po fork()
+_PID_HEX = f"{os.getpid():x}"
+
+
+def _refresh_pid_hex() -> None:
+    """Odświeża _PID_HEX w procesie potomnym."""
+    global _PID_HEX
+    _PID_HEX = f"{os.getpid():x}"
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_refresh_pid_hex)
+
+
+def generate_id(prefix: str = "task", readable: bool = True) -> str:
     """
     Generuje unikalny identyfikator.
     
+    Domyślny format to prefix_YYYYmmddHHMMSSffffff_losowe; tańszy format
+    z readable=False (prefix_nanosekundy_pid_losowe) trzeba wybrać jawnie,
+    bo identyfikatory z czytelnym znacznikiem czasu mogą być już zapisane
+    lub parsowane przez wywołujących.
+    
     Args:
         prefix: Prefiks identyfikatora
+        readable: Czy użyć czytelnego znacznika czasu (YYYYmmddHHMMSSffffff)
+            zamiast znacznika w nanosekundach z PID procesu
         
     Returns:
         Unikalny identyfikator
     """
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
-    random_part = hashlib.md5(f"{timestamp}-{os.getpid()}".encode()).hexdigest()[:8]
-    return f"{prefix}_{timestamp}_{random_part}"
+    random_part = secrets.token_hex(4)
+    if readable:
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        return f"{prefix}_{timestamp}_{random_part}"
+    
+    return f"{prefix}_{time.time_ns()}_{_PID_HEX}_{random_part}"
 
 
 def timed_execution(func: Callable) -> Callable:
@@ -54,10 +180,9 @@ def timed_execution(func: Callable) -> Callable:
         Funkcja z pomiarem czasu
     """
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        end_time = time.time()
-        duration = end_time - start_time
+        duration = (time.perf_counter_ns() - start_ns) / 1e9
         logger.info(f"Funkcja {func.__name__} wykonana w {duration:.4f} s")
         return result
     
@@ -115,42 +240,69 @@ def cache_result(ttl: int = 3600, cache_dir: Optional[str] = None) -> Callable:
         Funkcja z buforowaniem wyników
     """
     cache_path = Path(cache_dir) if cache_dir else CACHE_DIR
-    os.makedirs(cache_path, exist_ok=True)
+    _ensure_dir(cache_path)
     
     def decorator(func: Callable) -> Callable:
+        name_bytes = func.__name__.encode()
+        
         def wrapper(*args, **kwargs):
-            # Tworzenie klucza bufora
-            key_parts = [func.__name__]
-            key_parts.extend([str(arg) for arg in args])
-            key_parts.extend([f"{k}:{v}" for k, v in sorted(kwargs.items())])
-            key = hashlib.md5("_".join(key_parts).encode()).hexdigest()
+            # Tworzenie klucza bufora (przyrostowo, bez łączenia części w jeden ciąg);
+            # repr rozróżnia typy argumentów, np. 1 i "1"
+            hasher = hashlib.blake2b(digest_size=16)
+            hasher.update(name_bytes)
+            for arg in args:
+                hasher.update(b"\x00")
+                hasher.update(repr(arg).encode())
+            for k in sorted(kwargs):
+                hasher.update(b"\x00")
+                hasher.update(k.encode())
+                hasher.update(b"=")
+                hasher.update(repr(kwargs[k]).encode())
+            key = hasher.hexdigest()
             
             cache_file = cache_path / f"{key}.json"
+            mem_key = str(cache_file)
+            
+            # Sprawdzenie bufora w pamięci
+            hit, result = _mem_cache_get(mem_key, ttl)
+            if hit:
+                logger.debug(f"Użyto bufora dla funkcji {func.__name__}")
+                return result
             
-            # Sprawdzenie bufora
+            # Sprawdzenie bufora plikowego
             if cache_file.exists():
                 try:
-                    with open(cache_file, "r") as f:
-                        cached_data = json.load(f)
+                    with open(cache_file, "rb") as f:
+                        payload = f.read()
+                    cached_data = _loads_bytes(payload)
                     
                     # Sprawdzenie czasu życia
                     timestamp = cached_data.get("timestamp", 0)
                     if time.time() - timestamp <= ttl:
                         logger.debug(f"Użyto bufora dla funkcji {func.__name__}")
+                        _mem_cache_put(mem_key, timestamp, payload)
                         return cached_data.get("result")
                 except Exception as e:
                     logger.warning(f"Błąd odczytu bufora: {str(e)}")
             
             # Wykonanie funkcji
             result = func(*args, **kwargs)
+            timestamp = time.time()
             
-            # Zapisanie wyniku do bufora
+            # Zapisanie wyniku do bufora (atomowo, przez plik tymczasowy)
             try:
-                with open(cache_file, "w") as f:
-                    json.dump({
-                        "timestamp": time.time(),
-                        "result": result
-                    }, f)
+                cached_data = {"timestamp": timestamp, "result": result}
+                payload = _dumps_bytes(cached_data)
+                if payload is None:
+                    payload = json.dumps(cached_data).encode("utf-8")
+                
+                tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+                tmp_file.write_bytes(payload)
+                os.replace(tmp_file, cache_file)
+                
+                # Bufor w pamięci jest wypełniany dopiero po udanym zapisie,
+                # więc oba poziomy bufora zawsze zwracają to samo
+                _mem_cache_put(mem_key, timestamp, payload)
             except Exception as e:
                 logger.warning(f"Błąd zapisu bufora: {str(e)}")
             
@@ -183,19 +335,16 @@ def setup_logger(name: str, log_file: Optional[str] = None, level: int = logging
     # Dodanie handlera konsolowego
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
-    console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(console_formatter)
+    console_handler.setFormatter(_DEFAULT_FORMATTER)
     logger.addHandler(console_handler)
     
     # Dodanie handlera plikowego, jeśli podano plik
     if log_file:
-        log_path = Path(log_file)
-        os.makedirs(log_path.parent, exist_ok=True)
+        _ensure_dir(Path(log_file).parent)
         
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(level)
-        file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(file_formatter)
+        file_handler.setFormatter(_DEFAULT_FORMATTER)
         logger.addHandler(file_handler)
     
     return logger
@@ -212,8 +361,8 @@ def load_json(file_path: str) -> Dict[str, Any]:
         Dane JSON
     """
     try:
-        with open(file_path, "r") as f:
-            return json.load(f)
+        with open(file_path, "rb") as f:
+            return _loads_bytes(f.read())
     except Exception as e:
         logger.error(f"Błąd ładowania pliku JSON {file_path}: {str(e)}")
         return {}
@@ -229,8 +378,13 @@ def save_json(data: Dict[str, Any], file_path: str, indent: int = 4):
         indent: Wcięcie JSON
     """
     try:
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=indent)
+        payload = _dumps_bytes(data, indent)
+        if payload is None:
+            payload = json.dumps(data, indent=indent).encode("utf-8")
+        
+        # Jeden zapis gotowych bajtów zamiast strumieniowania przez json.dump
+        with open(file_path, "wb") as f:
+            f.write(payload)
     except Exception as e:
         logger.error(f"Błąd zapisywania pliku JSON {file_path}: {str(e)}")
 
@@ -247,14 +401,30 @@ def flatten_dict(d: Dict[str, Any], parent_key: str = '', sep: str = '.') -> Dic
     Returns:
         Spłaszczony słownik
     """
-    items = []
-    for k, v in d.items():
-        new_key = f"{parent_key}{sep}{k}" if parent_key else k
-        if isinstance(v, dict):
-            items.extend(flatten_dict(v, new_key, sep=sep).items())
+    # Iteracyjnie, ze stosem iteratorów zamiast rekurencji - kolejność kluczy
+    # pozostaje taka sama jak przy przejściu w głąb
+    items = {}
+    stack = [(parent_key, iter(d.items()))]
+    while stack:
+        prefix, it = stack[-1]
+        for k, v in it:
+            new_key = f"{prefix}{sep}{k}" if prefix else k
+            if isinstance(v, dict):
+                stack.append((new_key, iter(v.items())))
+                break
+            items[new_key] = v
         else:
-            items.append((new_key, v))
-    return dict(items)
+            stack.pop()
+    return items
+
+
+_MISSING = object()
+
+
+@functools.lru_cache(maxsize=4096)
+def _split_path(key_path: str, sep: str) -> tuple:
+    """Dzieli ścieżkę klucza na krotkę kluczy (wynik jest buforowany)."""
+    return tuple(key_path.split(sep))
 
 
 def get_nested_value(d: Dict[str, Any], key_path: str, sep: str = '.', default: Any = None) -> Any:
@@ -270,13 +440,13 @@ def get_nested_value(d: Dict[str, Any], key_path: str, sep: str = '.', default:
     Returns:
         Wartość lub wartość domyślna
     """
-    keys = key_path.split(sep)
     current = d
     
-    for key in keys:
-        if isinstance(current, dict) and key in current:
-            current = current[key]
-        else:
+    for key in _split_path(key_path, sep):
+        if not isinstance(current, dict):
+            return default
+        current = current.get(key, _MISSING)
+        if current is _MISSING:
             return default
     
     return current
@@ -295,10 +465,10 @@ def set_nested_value(d: Dict[str, Any], key_path: str, value: Any, sep: str = '.
     Returns:
         Zaktualizowany słownik
     """
-    keys = key_path.split(sep)
+    keys = _split_path(key_path, sep)
     current = d
     
-    for i, key in enumerate(keys[:-1]):
+    for key in keys[:-1]:
         if key not in current or not isinstance(current[key], dict):
             current[key] = {}
         current = current[key]
@@ -320,15 +490,51 @@ def merge_dicts(dict1: Dict[str, Any], dict2: Dict[str, Any]) -> Dict[str, Any]:
     """
     result = dict1.copy()
     
-    for key, value in dict2.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = merge_dicts(result[key], value)
-        else:
-            result[key] = value
+    # Iteracyjnie, ze stosem par (cel, źródło) zamiast rekurencji; zagnieżdżone
+    # słowniki są kopiowane przed scaleniem, więc dict1 pozostaje niezmieniony
+    stack = [(result, dict2)]
+    while stack:
+        dst, src = stack.pop()
+        for key, value in src.items():
+            current = dst.get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                current = current.copy()
+                dst[key] = current
+                stack.append((current, value))
+            else:
+                dst[key] = value
     
     return result
 
 
+def _format_minutes(seconds: float) -> str:
+    """Formatuje czas poniżej godziny jako minuty i sekundy."""
+    minutes = int(seconds / 60)
+    remaining_seconds = seconds % 60
+    return f"{minutes} min {remaining_seconds:.2f} s"
+
+
+def _format_hours(seconds: float) -> str:
+    """Formatuje czas jako godziny, minuty i sekundy."""
+    hours = int(seconds / 3600)
+    remaining = seconds % 3600
+    minutes = int(remaining / 60)
+    remaining_seconds = remaining % 60
+    return f"{hours} godz {minutes} min {remaining_seconds:.2f} s"
+
+
+# Progi (w sekundach) i odpowiadające im formatery dla format_time_delta;
+# formater o indeksie i obsługuje wartości z przedziału [próg i-1, próg i)
+_TIME_THRESHOLDS = (0.001, 1, 60, 3600)
+_TIME_FORMATTERS = (
+    lambda seconds: f"{seconds * 1000000:.2f} µs",
+    lambda seconds: f"{seconds * 1000:.2f} ms",
+    lambda seconds: f"{seconds:.2f} s",
+    _format_minutes,
+    _format_hours,
+)
+
+
 def format_time_delta(seconds: float) -> str:
     """
     Formatuje czas w sekundach do czytelnej postaci.
@@ -339,22 +545,11 @@ def format_time_delta(seconds: float) -> str:
     Returns:
         Sformatowany czas
     """
-    if seconds < 0.001:
-        return f"{seconds * 1000000:.2f} µs"
-    elif seconds < 1:
-        return f"{seconds * 1000:.2f} ms"
-    elif seconds < 60:
-        return f"{seconds:.2f} s"
-    elif seconds < 3600:
-        minutes = int(seconds / 60)
-        remaining_seconds = seconds % 60
-        return f"{minutes} min {remaining_seconds:.2f} s"
-    else:
-        hours = int(seconds / 3600)
-        remaining = seconds % 3600
-        minutes = int(remaining / 60)
-        remaining_seconds = remaining % 60
-        return f"{hours} godz {minutes} min {remaining_seconds:.2f} s"
+    return _TIME_FORMATTERS[bisect.bisect_right(_TIME_THRESHOLDS, seconds)](seconds)
+
+
+# Tabela zamiany znaków niedozwolonych w nazwach plików na "_"
+_SANITIZE_TABLE = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
 
 
 def sanitize_filename(filename: str) -> str:
@@ -367,14 +562,10 @@ def sanitize_filename(filename: str) -> str:
     Returns:
         Sanityzowana nazwa pliku
     """
-    # Znaki niedozwolone w nazwach plików
-    invalid_chars = '<>:"/\\|?*'
-    
-    # Zastąpienie niedozwolonych znaków
-    for char in invalid_chars:
-        filename = filename.replace(char, '_')
-    
-    return filename
+    return filename.translate(_SANITIZE_TABLE)
+
+
+_SIZE_NAMES = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
 
 
 def human_readable_size(size_bytes: int) -> str:
@@ -390,14 +581,17 @@ def human_readable_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return "0 B"
     
-    size_names = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
-    i = 0
+    if size_bytes < 1024:
+        return f"{size_bytes:.2f} B"
     
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024
-        i += 1
-    
-    return f"{size_bytes:.2f} {size_names[i]}"
+    # Wykładnik 1024 wyznaczony z liczby bitów zamiast pętli dzielenia
+    exp = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_NAMES) - 1)
+    return f"{size_bytes / (1 << (exp * 10)):.2f} {_SIZE_NAMES[exp]}"
+
+
+# Znaki, od których może zaczynać się dokument JSON (w tym NaN/Infinity,
+# akceptowane przez json.loads)
+_JSON_START_CHARS = frozenset('{["-0123456789tfnNI')
 
 
 def is_valid_json(json_str: str) -> bool:
@@ -410,6 +604,12 @@ def is_valid_json(json_str: str) -> bool:
     Returns:
         True, jeśli ciąg jest poprawnym JSON
     """
+    # Szybkie odrzucenie ciągów, które nie mogą zaczynać dokumentu JSON
+    if isinstance(json_str, str):
+        stripped = json_str.lstrip()
+        if not stripped or stripped[0] not in _JSON_START_CHARS:
+            return False
+    
     try:
         json.loads(json_str)
         return True
@@ -7,14 +7,45 @@ Taskinity flows and tasks.
 import time
 import json
 import logging
-import statistics
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Union, Callable, Tuple
 from functools import wraps
-import matplotlib.pyplot as plt
 import numpy as np
 
 
+def _times_path(output_path: Path) -> Path:
+    """
+    Get the path of the per-iteration times sidecar for a results file.
+    
+    Args:
+        output_path: Path to the JSON results file
+        
+    Returns:
+        Path to the .times.npz sidecar
+    """
+    return output_path.with_suffix(".times.npz")
+
+
+def _summarize(times: List[float]) -> Dict[str, float]:
+    """
+    Compute summary statistics for a list of iteration times.
+    
+    Args:
+        times: Iteration times in seconds
+        
+    Returns:
+        Dictionary with min, max, mean, median and stdev
+    """
+    arr = np.asarray(times, dtype=np.float64)
+    return {
+        "min": float(arr.min()),
+        "max": float(arr.max()),
+        "mean": float(arr.mean()),
+        "median": float(np.median(arr)),
+        "stdev": float(arr.std(ddof=1)) if arr.size > 1 else 0
+    }
+
+
 class PerformanceBenchmark:
     """Utility for benchmarking Taskinity flows and tasks."""
     
@@ -36,6 +67,8 @@ class PerformanceBenchmark:
         self.output_dir = output_dir
         self.logger = logger or logging.getLogger(__name__)
         self.results: Dict[str, List[Dict[str, Any]]] = {}
+        # Latest result per label, kept in sync with self.results
+        self._latest: Dict[str, Dict[str, Any]] = {}
         
         # Create output directory if it doesn't exist
         Path(output_dir).mkdir(parents=True, exist_ok=True)
@@ -76,10 +109,9 @@ class PerformanceBenchmark:
         # Perform benchmark iterations
         times = []
         for i in range(iterations):
-            start_time = time.time()
+            start_ns = time.perf_counter_ns()
             result = func(*args, **kwargs)
-            end_time = time.time()
-            elapsed_time = end_time - start_time
+            elapsed_time = (time.perf_counter_ns() - start_ns) / 1e9
             times.append(elapsed_time)
             self.logger.debug(f"Iteration {i+1}/{iterations}: {elapsed_time:.6f} seconds")
         
@@ -88,11 +120,7 @@ class PerformanceBenchmark:
             "label": label,
             "iterations": iterations,
             "times": times,
-            "min": min(times),
-            "max": max(times),
-            "mean": statistics.mean(times),
-            "median": statistics.median(times),
-            "stdev": statistics.stdev(times) if len(times) > 1 else 0,
+            **_summarize(times),
             "timestamp": time.time()
         }
         
@@ -101,6 +129,7 @@ class PerformanceBenchmark:
             self.results[label] = []
         
         self.results[label].append(benchmark_result)
+        self._latest[label] = benchmark_result
         
         self.logger.info(f"Benchmark {label} completed: {benchmark_result['mean']:.6f} seconds (mean)")
         return benchmark_result
@@ -120,16 +149,16 @@ class PerformanceBenchmark:
             return {}
         
         if labels is None:
-            labels = list(self.results.keys())
+            labels = list(self._latest.keys())
         
         comparison = {}
         for label in labels:
-            if label not in self.results:
+            # Get the latest benchmark result
+            result = self._latest.get(label)
+            if result is None:
                 self.logger.warning(f"Label {label} not found in benchmark results")
                 continue
             
-            # Get the latest benchmark result
-            result = self.results[label][-1]
             comparison[label] = {
                 "mean": result["mean"],
                 "median": result["median"],
@@ -154,6 +183,10 @@ class PerformanceBenchmark:
         """
         Save benchmark results to a file.
         
+        Scalar statistics are written as JSON; the per-iteration times of all
+        results are packed into a compressed numpy sidecar file
+        ({filename stem}.times.npz) next to it.
+        
         Args:
             filename: Output filename (default: {name}_benchmark.json)
             
@@ -169,8 +202,22 @@ class PerformanceBenchmark:
         
         output_path = Path(self.output_dir) / filename
         
+        metadata = {}
+        times = []
+        for label, results in self.results.items():
+            metadata[label] = []
+            for result in results:
+                metadata[label].append({k: v for k, v in result.items() if k != "times"})
+                times.append(result.get("times", []))
+        
+        np.savez_compressed(
+            _times_path(output_path),
+            times=np.concatenate(times).astype(np.float64) if times else np.empty(0),
+            lengths=np.array([len(t) for t in times], dtype=np.int64)
+        )
+        
         with open(output_path, "w") as f:
-            json.dump(self.results, f, indent=2)
+            json.dump(metadata, f, indent=2)
         
         self.logger.info(f"Benchmark results saved to {output_path}")
         return str(output_path)
@@ -192,7 +239,25 @@ class PerformanceBenchmark:
         
         try:
             with open(input_path, "r") as f:
-                self.results = json.load(f)
+                results = json.load(f)
+            
+            # Restore per-iteration times from the sidecar file; older files
+            # keep the times inline in the JSON
+            times_path = _times_path(input_path)
+            if times_path.exists():
+                with np.load(times_path) as packed:
+                    offsets = np.cumsum(packed["lengths"])[:-1]
+                    times = iter(np.split(packed["times"], offsets))
+                for label_results in results.values():
+                    for result in label_results:
+                        result["times"] = next(times).tolist()
+            
+            self.results = results
+            self._latest = {
+                label: label_results[-1]
+                for label, label_results in results.items()
+                if label_results
+            }
             
             self.logger.info(f"Benchmark results loaded from {input_path}")
             return True
@@ -225,7 +290,7 @@ class PerformanceBenchmark:
             return None
         
         if labels is None:
-            labels = list(self.results.keys())
+            labels = list(self._latest.keys())
         
         if metric not in ["mean", "median", "min", "max", "stdev"]:
             self.logger.warning(f"Invalid metric: {metric}, using mean")
@@ -239,12 +304,12 @@ class PerformanceBenchmark:
         # Extract data for plotting
         plot_data = []
         for label in labels:
-            if label not in self.results:
+            # Get the latest benchmark result
+            result = self._latest.get(label)
+            if result is None:
                 self.logger.warning(f"Label {label} not found in benchmark results")
                 continue
             
-            # Get the latest benchmark result
-            result = self.results[label][-1]
             plot_data.append((label, result[metric]))
         
         if not plot_data:
@@ -254,6 +319,9 @@ class PerformanceBenchmark:
         # Sort data by metric value
         plot_data.sort(key=lambda x: x[1])
         
+        # Imported here so the module loads without matplotlib's startup cost
+        import matplotlib.pyplot as plt
+        
         # Create plot
         fig, ax = plt.subplots(figsize=(10, 6))
         
@@ -326,6 +394,9 @@ class PerformanceBenchmark:
         
         output_path = Path(self.output_dir) / output_file
         
+        # Imported here so the module loads without matplotlib's startup cost
+        import matplotlib.pyplot as plt
+        
         # Create plot with multiple subplots
         fig, axes = plt.subplots(2, 2, figsize=(12, 10))
         axes = axes.flatten()
@@ -397,6 +468,11 @@ def benchmark(
     """
     Decorator for benchmarking functions.
     
+    Calling the decorated function runs it once, without measurement. To
+    benchmark it, call ``func.run_benchmark(*args, **kwargs)`` or pass
+    ``_benchmark=True``; the benchmark result is attached to the returned
+    value as ``__benchmark__`` when possible.
+    
     Args:
         iterations: Number of iterations to run (default: 10)
         warmup: Number of warmup iterations (default: 1)
@@ -406,9 +482,9 @@ def benchmark(
         Decorated function
     """
     def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            func_label = label or func.__name__
+        func_label = label or func.__name__
+        
+        def run_benchmark(*args, **kwargs):
             logger = logging.getLogger(__name__)
             logger.info(f"Benchmarking {func_label} ({iterations} iterations, {warmup} warmup)")
             
@@ -419,10 +495,9 @@ def benchmark(
             # Perform benchmark iterations
             times = []
             for i in range(iterations):
-                start_time = time.time()
+                start_ns = time.perf_counter_ns()
                 result = func(*args, **kwargs)
-                end_time = time.time()
-                elapsed_time = end_time - start_time
+                elapsed_time = (time.perf_counter_ns() - start_ns) / 1e9
                 times.append(elapsed_time)
                 logger.debug(f"Iteration {i+1}/{iterations}: {elapsed_time:.6f} seconds")
             
@@ -431,11 +506,7 @@ def benchmark(
                 "label": func_label,
                 "iterations": iterations,
                 "times": times,
-                "min": min(times),
-                "max": max(times),
-                "mean": statistics.mean(times),
-                "median": statistics.median(times),
-                "stdev": statistics.stdev(times) if len(times) > 1 else 0
+                **_summarize(times)
             }
             
             logger.info(f"Benchmark {func_label} completed: {benchmark_result['mean']:.6f} seconds (mean)")
@@ -446,6 +517,13 @@ def benchmark(
             
             return result
         
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if kwargs.pop("_benchmark", False):
+                return run_benchmark(*args, **kwargs)
+            return func(*args, **kwargs)
+        
+        wrapper.run_benchmark = run_benchmark
         return wrapper
     
     return decorator
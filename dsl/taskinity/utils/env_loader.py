@@ -4,22 +4,166 @@ Environment variable loader for Taskinity.
 This module provides utilities for loading and accessing environment variables
 in a consistent way across Taskinity examples and projects.
 """
+from __future__ import annotations
+
 import os
+import stat
+import functools
+import itertools
 import logging
+import re
 from pathlib import Path
-from typing import Dict, Any, Optional, Union, List
+from typing import Dict, Any, Optional, Union, List, Tuple, Callable
 
 # Check if dotenv is available
 try:
-    from dotenv import load_dotenv
+    from dotenv import dotenv_values
     DOTENV_AVAILABLE = True
 except ImportError:
     DOTENV_AVAILABLE = False
 
+# Parsed .env files keyed by (path, mtime_ns, size), so an unchanged file is
+# only parsed once per process
+_parse_cache: Dict[Tuple[str, int, int], Dict[str, str]] = {}
+
+
+# Number of parent directories searched for a .env file
+_ENV_SEARCH_DEPTH = 6
+
+# Flags and chunk size for reading .env files
+_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+_READ_CHUNK = 65536
+
+# Marker for values that failed type conversion
+_INVALID = object()
+
+# Accepted spellings of boolean values for get_bool
+_TRUTHY = frozenset({
+    "true", "True", "TRUE", "yes", "Yes", "YES", "1", "y", "Y", "t", "T"
+})
+_FALSY = frozenset({
+    "false", "False", "FALSE", "no", "No", "NO", "0", "n", "N", "f", "F", ""
+})
+
+
+# Set once load_env() has applied a .env file to os.environ; from then on
+# plain lookups can skip the loader
+_HAS_LOADER = False
+
+# Compiled list-splitting patterns keyed by separator
+_SPLIT_CACHE: Dict[str, re.Pattern] = {}
+
+
+def _split_list(value: str, separator: str) -> Tuple[str, ...]:
+    """
+    Split a list value and strip whitespace around its items.
+    
+    Args:
+        value: Raw environment variable value
+        separator: Separator for list items
+        
+    Returns:
+        List items
+    """
+    if not separator.strip():
+        # Whitespace separators would be swallowed by the pattern below
+        return tuple(item.strip() for item in value.split(separator))
+    
+    pattern = _SPLIT_CACHE.get(separator)
+    if pattern is None:
+        pattern = _SPLIT_CACHE[separator] = re.compile(r"\s*" + re.escape(separator) + r"\s*")
+    return tuple(pattern.split(value.strip()))
+
+
+def _stat_or_none(path: str) -> Optional[os.stat_result]:
+    """
+    Stat a path, returning None if it is not an existing regular file.
+    
+    Args:
+        path: Path to stat
+        
+    Returns:
+        Stat result or None
+    """
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    # A directory named .env (e.g. a virtualenv) is not an env file
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st
+
+
+def _parse_simple_env(data: bytes) -> Optional[Dict[str, str]]:
+    """
+    Parse a .env file made only of plain KEY=value lines.
+    
+    Args:
+        data: Raw file contents
+        
+    Returns:
+        Parsed variables, or None if the file needs the full dotenv parser
+        (quoting, escapes, interpolation or inline comments)
+    """
+    if b"$" in data or b'"' in data or b"'" in data or b"\\" in data:
+        return None
+    
+    parsed = {}
+    for raw_line in data.decode("utf-8").splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "#" in line:
+            return None
+        
+        key, sep, value = line.partition("=")
+        if not sep:
+            # dotenv treats a bare key as unset
+            continue
+        
+        key = key.strip()
+        if key.startswith("export "):
+            key = key[len("export "):].strip()
+        if not key or len(key.split()) != 1:
+            return None
+        parsed[key] = value.strip()
+    
+    return parsed
+
+
+def _parse_env_file(env_file: str) -> Dict[str, str]:
+    """
+    Parse a .env file, using a fast path for plain KEY=value files.
+    
+    Args:
+        env_file: Path to .env file
+        
+    Returns:
+        Parsed variables (keys without a value are omitted)
+    """
+    # .env files are small: read them with one unbuffered read, and only
+    # fall back to a buffered read for files that fill the whole chunk
+    fd = os.open(env_file, _OPEN_FLAGS)
+    try:
+        data = os.read(fd, _READ_CHUNK)
+    finally:
+        os.close(fd)
+    if len(data) == _READ_CHUNK:
+        with open(env_file, "rb") as f:
+            data = f.read()
+    
+    parsed = _parse_simple_env(data)
+    if parsed is None:
+        parsed = {k: v for k, v in dotenv_values(env_file).items() if v is not None}
+    return parsed
+
 
 class EnvLoader:
     """Utility for loading and accessing environment variables."""
     
+    __slots__ = ("logger", "_typed_cache")
+    
     def __init__(self, env_file: Optional[str] = None, load_from_file: bool = True):
         """
         Initialize the environment loader.
@@ -29,14 +173,12 @@ class EnvLoader:
             load_from_file: Whether to load variables from .env file (default: True)
         """
         self.logger = logging.getLogger(__name__)
-        self.env_vars: Dict[str, str] = {}
+        # Converted values keyed by (conversion, name, raw value)
+        self._typed_cache: Dict[Tuple[Any, str, str], Any] = {}
         
         # Load environment variables from file if requested
         if load_from_file:
             self._load_from_file(env_file)
-        
-        # Load environment variables from os.environ
-        self._load_from_environ()
     
     def _load_from_file(self, env_file: Optional[str] = None) -> None:
         """
@@ -50,29 +192,49 @@ class EnvLoader:
             self.logger.warning("Install with: pip install python-dotenv")
             return
         
-        # Find .env file
+        # Find .env file; each candidate costs a single stat() whose result
+        # is reused as the parse cache key
+        st = None
         if env_file is None:
-            # Look for .env file in current directory and parent directories
-            current_dir = Path.cwd()
-            env_path = current_dir / ".env"
-            
-            while not env_path.exists() and current_dir != current_dir.parent:
-                current_dir = current_dir.parent
-                env_path = current_dir / ".env"
-            
-            if env_path.exists():
-                env_file = str(env_path)
+            # Look for .env file in current directory and a bounded number of
+            # parent directories
+            cwd = Path.cwd()
+            for directory in itertools.chain([cwd], itertools.islice(cwd.parents, _ENV_SEARCH_DEPTH)):
+                candidate = str(directory / ".env")
+                st = _stat_or_none(candidate)
+                if st is not None:
+                    env_file = candidate
+                    break
+        else:
+            st = _stat_or_none(str(env_file))
         
         # Load environment variables from file
-        if env_file is not None and Path(env_file).exists():
-            load_dotenv(env_file)
+        if st is not None:
+            cache_key = (str(env_file), st.st_mtime_ns, st.st_size)
+            parsed = _parse_cache.get(cache_key)
+            if parsed is None:
+                parsed = _parse_env_file(env_file)
+                _parse_cache[cache_key] = parsed
+            
+            # Like load_dotenv, never override variables that are already set
+            os.environ.update({k: v for k, v in parsed.items() if k not in os.environ})
+            
             self.logger.info(f"Loaded environment variables from {env_file}")
         else:
             self.logger.warning(f"Environment file not found: {env_file}")
     
-    def _load_from_environ(self) -> None:
-        """Load environment variables from os.environ."""
-        self.env_vars = dict(os.environ)
+    @property
+    def env_vars(self) -> Dict[str, str]:
+        """
+        Environment variables, including those loaded from the .env file.
+        
+        Values loaded or set by the loader are kept only in os.environ, so
+        this is a copy of the current environment.
+        
+        Returns:
+            Dictionary of environment variables
+        """
+        return dict(os.environ)
     
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -85,7 +247,9 @@ class EnvLoader:
         Returns:
             Environment variable value or default
         """
-        return self.env_vars.get(key, default)
+        # Values loaded from the file or set through the loader are written
+        # to os.environ, so later changes to the environment are seen too
+        return os.environ.get(key, default)
     
     def get_required(self, key: str) -> str:
         """
@@ -105,6 +269,31 @@ class EnvLoader:
             raise ValueError(f"Required environment variable not set: {key}")
         return value
     
+    def _convert(self, kind: Any, key: str, value: str, convert: Callable[[str], Any]) -> Any:
+        """
+        Convert a raw value, reusing the result of earlier conversions.
+        
+        Args:
+            kind: Conversion identifier (part of the cache key)
+            key: Environment variable name
+            value: Raw environment variable value
+            convert: Conversion function
+            
+        Returns:
+            Converted value, or _INVALID if conversion raised ValueError
+        """
+        cache_key = (kind, key, value)
+        if cache_key in self._typed_cache:
+            return self._typed_cache[cache_key]
+        
+        try:
+            result = convert(value)
+        except ValueError:
+            result = _INVALID
+        
+        self._typed_cache[cache_key] = result
+        return result
+    
     def get_int(self, key: str, default: Optional[int] = None) -> Optional[int]:
         """
         Get environment variable as integer.
@@ -120,11 +309,11 @@ class EnvLoader:
         if value is None:
             return default
         
-        try:
-            return int(value)
-        except ValueError:
+        result = self._convert("int", key, value, int)
+        if result is _INVALID:
             self.logger.warning(f"Environment variable {key} is not a valid integer: {value}")
             return default
+        return result
     
     def get_float(self, key: str, default: Optional[float] = None) -> Optional[float]:
         """
@@ -141,11 +330,11 @@ class EnvLoader:
         if value is None:
             return default
         
-        try:
-            return float(value)
-        except ValueError:
+        result = self._convert("float", key, value, float)
+        if result is _INVALID:
             self.logger.warning(f"Environment variable {key} is not a valid float: {value}")
             return default
+        return result
     
     def get_bool(self, key: str, default: Optional[bool] = None) -> Optional[bool]:
         """
@@ -162,7 +351,13 @@ class EnvLoader:
         if value is None:
             return default
         
-        return value.lower() in ("true", "yes", "1", "y", "t")
+        # Common spellings are answered by a set lookup; only unusual casings
+        # such as "tRuE" pay for lower()
+        if value in _TRUTHY:
+            return True
+        if value in _FALSY:
+            return False
+        return value.lower() in _TRUTHY
     
     def get_list(self, key: str, separator: str = ",", default: Optional[List[str]] = None) -> Optional[List[str]]:
         """
@@ -180,7 +375,11 @@ class EnvLoader:
         if value is None:
             return default
         
-        return [item.strip() for item in value.split(separator)]
+        items = self._convert(
+            ("list", separator), key, value,
+            lambda raw: _split_list(raw, separator)
+        )
+        return list(items)
     
     def set(self, key: str, value: str) -> None:
         """
@@ -191,7 +390,10 @@ class EnvLoader:
             value: Environment variable value
         """
         os.environ[key] = value
-        self.env_vars[key] = value
+        
+        # Drop converted values of the previous value
+        for cache_key in [k for k in self._typed_cache if k[1] == key]:
+            del self._typed_cache[cache_key]
     
     def as_dict(self) -> Dict[str, str]:
         """
@@ -200,29 +402,49 @@ class EnvLoader:
         Returns:
             Dictionary of environment variables
         """
-        return self.env_vars.copy()
+        return self.env_vars
 
 
-# Global environment loader instance
-_env_loader = None
+@functools.lru_cache(maxsize=32)
+def _get_loader(env_file: Optional[str], load_from_file: bool) -> EnvLoader:
+    """
+    Get the shared environment loader for an env file.
+    
+    Args:
+        env_file: Path to .env file (None to search for one)
+        load_from_file: Whether to load variables from .env file
+        
+    Returns:
+        Environment loader instance
+    """
+    return EnvLoader(env_file=env_file, load_from_file=load_from_file)
 
 
-def load_env(env_file: Optional[str] = None) -> EnvLoader:
+def load_env(env_file: Optional[str] = None, load_from_file: bool = True) -> EnvLoader:
     """
     Load environment variables.
     
+    Loaders are shared per env file, so repeated calls with the same
+    arguments return the same instance.
+    
     Args:
         env_file: Path to .env file (optional)
+        load_from_file: Whether to load variables from .env file (default: True)
         
     Returns:
         Environment loader instance
     """
-    global _env_loader
-    
-    if _env_loader is None:
-        _env_loader = EnvLoader(env_file=env_file)
-    
-    return _env_loader
+    global _HAS_LOADER
+    loader = _get_loader(env_file, load_from_file)
+    _HAS_LOADER = True
+    return loader
+
+
+def _reset_loaders() -> None:
+    """Drop shared loaders so the next load_env() call re-applies its .env file."""
+    global _HAS_LOADER
+    _get_loader.cache_clear()
+    _HAS_LOADER = False
 
 
 def get_env(key: str, default: Any = None) -> Any:
@@ -236,6 +458,9 @@ def get_env(key: str, default: Any = None) -> Any:
     Returns:
         Environment variable value or default
     """
+    # Loaders write every value they load or set into os.environ
+    if _HAS_LOADER:
+        return os.environ.get(key, default)
     return load_env().get(key, default)
 
 
@@ -252,6 +477,11 @@ def get_required_env(key: str) -> str:
     Raises:
         ValueError: If environment variable is not set
     """
+    if _HAS_LOADER:
+        value = os.environ.get(key)
+        if value is None:
+            raise ValueError(f"Required environment variable not set: {key}")
+        return value
     return load_env().get_required(key)
 
 
@@ -3,6 +3,8 @@ Pytest configuration for Taskinity tests.
 
 This module contains fixtures and configuration for Taskinity tests.
 """
+from __future__ import annotations
+
 import os
 import sys
 import pytest
@@ -15,6 +17,13 @@ from typing import Dict, Any, Generator, Tuple
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# Environment variables cleared by the clean_env fixture
+_TEST_VARS = (
+    "LOG_LEVEL", "LOG_DIR", "OUTPUT_DIR", "REPORT_FORMAT",
+    "DB_TYPE", "DB_NAME", "API_TIMEOUT", "API_RETRIES",
+    "TEST_INT", "TEST_FLOAT", "TEST_BOOL", "TEST_LIST"
+)
+
 
 @pytest.fixture
 def temp_dir() -> Generator[Path, None, None]:
@@ -28,17 +37,20 @@ def temp_dir() -> Generator[Path, None, None]:
         yield Path(temp_dir)
 
 
-@pytest.fixture
-def temp_env_file(temp_dir: Path) -> Tuple[Path, Dict[str, str]]:
+@pytest.fixture(scope="module")
+def temp_env_file(tmp_path_factory: pytest.TempPathFactory) -> Tuple[Path, Dict[str, str]]:
     """
     Create a temporary .env file for tests.
     
+    The file is created once per test module; tests must not modify it.
+    
     Args:
-        temp_dir: Temporary directory
+        tmp_path_factory: Pytest temporary path factory
         
     Returns:
         Tuple of (path to .env file, environment variables dictionary)
     """
+    temp_dir = tmp_path_factory.mktemp("env")
     env_vars = {
         "LOG_LEVEL": "DEBUG",
         "LOG_DIR": str(temp_dir / "logs"),
@@ -55,14 +67,12 @@ def temp_env_file(temp_dir: Path) -> Tuple[Path, Dict[str, str]]:
     }
     
     env_file = temp_dir / ".env"
-    with open(env_file, "w") as f:
-        for key, value in env_vars.items():
-            f.write(f"{key}={value}\n")
+    env_file.write_text("".join(f"{key}={value}\n" for key, value in env_vars.items()))
     
     return env_file, env_vars
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_dsl() -> str:
     """
     Create a sample DSL for tests.
@@ -80,7 +90,7 @@ flow TestFlow:
 """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_flow_data() -> Dict[str, Any]:
     """
     Create sample flow data for tests.
@@ -120,6 +130,32 @@ def sample_flow_data() -> Dict[str, Any]:
     }
 
 
+# Payload returned by mock_request
+_DEFAULT_JSON = {"success": True, "data": {"test": "data"}}
+
+
+class MockResponse:
+    """Minimal stand-in for requests.Response."""
+    
+    def __init__(self, status_code=200, json_data=None, text="", headers=None):
+        self.status_code = status_code
+        self._json_data = json_data or {}
+        self.text = text
+        self.headers = headers or {"content-type": "application/json"}
+    
+    def json(self):
+        return self._json_data
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP Error: {self.status_code}")
+
+
+def mock_request(*args, **kwargs):
+    """Return a successful MockResponse for any request."""
+    return MockResponse(json_data=_DEFAULT_JSON)
+
+
 @pytest.fixture
 def mock_api_server(monkeypatch) -> None:
     """
@@ -128,23 +164,6 @@ def mock_api_server(monkeypatch) -> None:
     Args:
         monkeypatch: Pytest monkeypatch fixture
     """
-    class MockResponse:
-        def __init__(self, status_code=200, json_data=None, text="", headers=None):
-            self.status_code = status_code
-            self._json_data = json_data or {}
-            self.text = text
-            self.headers = headers or {"content-type": "application/json"}
-        
-        def json(self):
-            return self._json_data
-        
-        def raise_for_status(self):
-            if self.status_code >= 400:
-                raise Exception(f"HTTP Error: {self.status_code}")
-    
-    def mock_request(*args, **kwargs):
-        return MockResponse(json_data={"success": True, "data": {"test": "data"}})
-    
     # Mock requests.request and requests.Session.request
     if "requests" in sys.modules:
         monkeypatch.setattr(sys.modules["requests"], "request", mock_request)
@@ -160,31 +179,39 @@ def disable_logging() -> None:
 
 
 @pytest.fixture
-def clean_env(monkeypatch) -> None:
+def clean_env() -> Generator[None, None, None]:
     """
     Clean environment variables for tests.
     
-    Args:
-        monkeypatch: Pytest monkeypatch fixture
+    The whole environment is snapshotted and restored afterwards, so
+    variables set by a test (e.g. via set_env) don't leak into other tests.
+    
+    Shared loaders returned by load_env() are reset once before and once
+    after each test: within a test repeated load_env() calls reuse one
+    loader, but no loader (or the values set through it) survives into
+    the next test.
     """
+    # Imported here so that loading conftest doesn't import the taskinity
+    # package; tests that don't need the environment still get collected
+    import taskinity.utils.env_loader as _env_loader
+    
     # Save original environment
-    original_environ = dict(os.environ)
+    original_environ = os.environ.copy()
     
     # Clear environment variables used in tests
-    test_vars = [
-        "LOG_LEVEL", "LOG_DIR", "OUTPUT_DIR", "REPORT_FORMAT",
-        "DB_TYPE", "DB_NAME", "API_TIMEOUT", "API_RETRIES",
-        "TEST_INT", "TEST_FLOAT", "TEST_BOOL", "TEST_LIST"
-    ]
+    for var in _TEST_VARS:
+        os.environ.pop(var, None)
     
-    for var in test_vars:
-        monkeypatch.delenv(var, raising=False)
+    # Shared loaders already applied their .env files; drop them so the next
+    # load_env() call re-applies the file to the cleaned environment
+    _env_loader._reset_loaders()
     
     yield
     
+    # Loaders remember values set through them, which would outlive the
+    # restored environment
+    _env_loader._reset_loaders()
+    
     # Restore original environment
-    for var in test_vars:
-        if var in original_environ:
-            monkeypatch.setenv(var, original_environ[var])
-        else:
-            monkeypatch.delenv(var, raising=False)
+    os.environ.clear()
+    os.environ.update(original_environ)
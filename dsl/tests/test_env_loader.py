@@ -16,6 +16,32 @@ from taskinity.utils.env_loader import (
     set_env
 )
 
+# Boolean spellings and the value get_bool should return for them
+_BOOL_CASES = [
+    ("true", True),
+    ("True", True),
+    ("TRUE", True),
+    ("yes", True),
+    ("Yes", True),
+    ("YES", True),
+    ("1", True),
+    ("y", True),
+    ("Y", True),
+    ("t", True),
+    ("T", True),
+    ("false", False),
+    ("False", False),
+    ("FALSE", False),
+    ("no", False),
+    ("No", False),
+    ("NO", False),
+    ("0", False),
+    ("n", False),
+    ("N", False),
+    ("f", False),
+    ("F", False),
+]
+
 
 class TestEnvLoader:
     """Tests for the EnvLoader class."""
@@ -36,6 +62,18 @@ class TestEnvLoader:
         for key, value in env_vars.items():
             assert loader.get(key) == value
     
+    def test_env_directory_is_skipped(self, temp_dir, clean_env, monkeypatch):
+        """Test that a directory named .env is not read as an env file."""
+        env_dir = temp_dir / ".env"
+        env_dir.mkdir()
+        
+        # Neither an explicit path nor the directory search may raise
+        loader = EnvLoader(env_file=str(env_dir))
+        assert loader.get("NON_EXISTENT") is None
+        
+        monkeypatch.chdir(temp_dir)
+        EnvLoader()
+    
     def test_get(self, temp_env_file, clean_env):
         """Test getting environment variables."""
         env_file, env_vars = temp_env_file
@@ -111,36 +149,13 @@ class TestEnvLoader:
         
         # Test getting non-existent variable with default
         assert loader.get_bool("NON_EXISTENT", False) is False
-        
-        # Test different boolean values
-        boolean_values = {
-            "true": True,
-            "True": True,
-            "TRUE": True,
-            "yes": True,
-            "Yes": True,
-            "YES": True,
-            "1": True,
-            "y": True,
-            "Y": True,
-            "t": True,
-            "T": True,
-            "false": False,
-            "False": False,
-            "FALSE": False,
-            "no": False,
-            "No": False,
-            "NO": False,
-            "0": False,
-            "n": False,
-            "N": False,
-            "f": False,
-            "F": False
-        }
-        
-        for value, expected in boolean_values.items():
-            set_env("TEST_BOOL", value)
-            assert loader.get_bool("TEST_BOOL") is expected
+    
+    @pytest.mark.parametrize("value, expected", _BOOL_CASES)
+    def test_get_bool_case(self, value, expected, clean_env):
+        """Test the accepted spellings of boolean values."""
+        loader = EnvLoader(load_from_file=False)
+        loader.set("TEST_BOOL", value)
+        assert loader.get_bool("TEST_BOOL") is expected
     
     def test_get_list(self, temp_env_file, clean_env):
         """Test getting environment variables as lists."""
@@ -175,6 +190,19 @@ class TestEnvLoader:
         assert loader.get("TEST_SET") == "test_value"
         assert os.environ.get("TEST_SET") == "test_value"
     
+    def test_get_reads_current_environ(self, temp_env_file, clean_env):
+        """Test that changes to os.environ after loading are visible."""
+        env_file, env_vars = temp_env_file
+        loader = EnvLoader(env_file=str(env_file))
+        loader.set("TEST_SET", "test_value")
+        
+        # Change values loaded from the file and set through the loader
+        os.environ["LOG_LEVEL"] = "ERROR"
+        os.environ["TEST_SET"] = "changed"
+        
+        assert loader.get("LOG_LEVEL") == "ERROR"
+        assert loader.get("TEST_SET") == "changed"
+    
     def test_as_dict(self, temp_env_file, clean_env):
         """Test getting all environment variables as dictionary."""
         env_file, env_vars = temp_env_file
@@ -0,0 +1,45 @@
+"""
+Tests for the helper functions in taskinity/utils.py.
+"""
+import importlib.util
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# The taskinity/utils/ package shadows taskinity/utils.py on import, so the
+# module is loaded from its file
+_spec = importlib.util.spec_from_file_location(
+    "taskinity_utils_module", Path(__file__).parent.parent / "taskinity" / "utils.py"
+)
+utils = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(utils)
+
+
+class TestGenerateId:
+    """Tests for generate_id."""
+    
+    def test_generate_id_default_is_readable(self):
+        """Test that the default ID keeps the readable timestamp format."""
+        task_id = utils.generate_id("flow")
+        
+        match = re.fullmatch(r"flow_(\d{20})_([0-9a-f]{8})", task_id)
+        assert match is not None
+        # The timestamp parses back into a datetime
+        datetime.strptime(match.group(1), "%Y%m%d%H%M%S%f")
+    
+    def test_generate_id_compact(self):
+        """Test the compact format with a nanosecond timestamp and PID."""
+        task_id = utils.generate_id("flow", readable=False)
+        
+        match = re.fullmatch(r"flow_(\d+)_([0-9a-f]+)_([0-9a-f]{8})", task_id)
+        assert match is not None
+        assert int(match.group(2), 16) == os.getpid()
+    
+    @pytest.mark.parametrize("readable", [True, False])
+    def test_generate_id_unique(self, readable):
+        """Test that consecutive IDs differ."""
+        ids = {utils.generate_id(readable=readable) for _ in range(1000)}
+        assert len(ids) == 1000
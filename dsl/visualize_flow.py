@@ -5,14 +5,96 @@ Prosty skrypt do wizualizacji przepływów DSL.
 import os
 import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Any
 
-import matplotlib.pyplot as plt
-import networkx as nx
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import graphviz
+    GRAPHVIZ_AVAILABLE = True
+except ImportError:
+    GRAPHVIZ_AVAILABLE = False
 
 from flow_dsl import parse_dsl, load_dsl, list_dsl_files, list_flows
 
+# Kolory węzłów w zależności od statusu zadania
+STATUS_COLORS = {
+    "COMPLETED": "lightgreen",
+    "FAILED": "lightcoral",
+    "RUNNING": "lightskyblue",
+    "PENDING": "lightgray",
+    "SKIPPED": "lightyellow",
+    "UNKNOWN": "white"
+}
+
+# Maksymalna liczba wątków wczytujących pliki zadań
+TASK_READ_WORKERS = 16
+
+def _read_json(path: str) -> Any:
+    """
+    Wczytuje plik JSON (przez orjson, jeśli jest dostępny).
+    
+    Args:
+        path: Ścieżka do pliku
+        
+    Returns:
+        Wczytane dane lub None, jeśli plik nie istnieje
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+def _layered_layout(G: "nx.DiGraph") -> Dict[str, Any]:
+    """
+    Wyznacza warstwowy układ grafu (kolejne poziomy zależności od lewej).
+    
+    Args:
+        G: Graf przepływu
+        
+    Returns:
+        Pozycje węzłów
+    """
+    import networkx as nx
+    
+    try:
+        for layer, nodes in enumerate(nx.topological_generations(G)):
+            for node in nodes:
+                G.nodes[node]["layer"] = layer
+    except nx.NetworkXUnfeasible:
+        # Graf z cyklem nie ma warstw
+        return nx.spring_layout(G, seed=42)
+    return nx.multipartite_layout(G, subset_key="layer")
+
+def _render_graphviz(title: str, nodes: Dict[str, Dict[str, str]], edges: List[tuple], output_file: str):
+    """
+    Renderuje graf przepływu przez Graphviz (dot) do pliku.
+    
+    Args:
+        title: Tytuł grafu
+        nodes: Atrybuty węzłów (etykieta, kolor) według nazwy węzła
+        edges: Krawędzie jako pary (źródło, cel)
+        output_file: Ścieżka do pliku wyjściowego (format wg rozszerzenia)
+    """
+    dot = graphviz.Digraph(graph_attr={"rankdir": "LR", "label": title, "labelloc": "t"},
+                           node_attr={"shape": "box", "style": "filled,rounded"})
+    for node, attrs in nodes.items():
+        dot.node(node, **attrs)
+    for source, target in edges:
+        dot.edge(source, target)
+    
+    output_format = Path(output_file).suffix.lstrip(".") or "png"
+    dot.render(outfile=output_file, format=output_format, cleanup=True)
+    print(f"Zapisano wizualizację do pliku: {output_file}")
+
 def visualize_dsl(dsl_text: str, output_file: str = None):
     """
     Wizualizuje przepływ zdefiniowany w DSL.
@@ -26,6 +108,20 @@ def visualize_dsl(dsl_text: str, output_file: str = None):
     flow_name = flow_def["name"]
     connections = flow_def["connections"]
     
+    # Do pliku renderuje Graphviz, bez układu liczonego w Pythonie
+    if output_file and GRAPHVIZ_AVAILABLE:
+        nodes = {}
+        for conn in connections:
+            nodes.setdefault(conn["source"], {"fillcolor": "lightblue"})
+            nodes.setdefault(conn["target"], {"fillcolor": "lightblue"})
+        edges = [(conn["source"], conn["target"]) for conn in connections]
+        _render_graphviz(f"Przepływ: {flow_name}", nodes, edges, output_file)
+        return
+    
+    # matplotlib i networkx są potrzebne tylko do rysowania na ekranie
+    import matplotlib.pyplot as plt
+    import networkx as nx
+    
     # Tworzenie grafu
     G = nx.DiGraph()
     
@@ -39,7 +135,7 @@ def visualize_dsl(dsl_text: str, output_file: str = None):
     
     # Rysowanie grafu
     plt.figure(figsize=(12, 8))
-    pos = nx.spring_layout(G, seed=42)  # Pozycje węzłów
+    pos = _layered_layout(G)  # Pozycje węzłów
     
     # Rysowanie węzłów
     nx.draw_networkx_nodes(G, pos, node_size=2000, node_color="lightblue", alpha=0.8)
@@ -80,47 +176,89 @@ def visualize_flow_history(flow_id: str, output_file: str = None):
     with open(flow_file, "r") as f:
         flow_data = json.load(f)
     
-    # Tworzenie grafu
-    G = nx.DiGraph()
-    
-    # Dodawanie węzłów i krawędzi na podstawie historii zadań
+    # Zadania z historii przepływu
     tasks = flow_data.get("tasks", [])
     
-    # Wczytanie szczegółów zadań
+    # Wczytanie szczegółów zadań: jednym odczytem z pliku JSONL przepływu,
+    # a dla starszych przepływów równolegle z osobnych plików zadań
+    tasks_file = os.path.join(flow_dir, f"{flow_id}.tasks.jsonl")
+    if os.path.exists(tasks_file):
+        with open(tasks_file, "rb") as f:
+            loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+            records = {}
+            for line in f.read().splitlines():
+                if line:
+                    record = loads(line)
+                    records[record.get("task_id")] = record
+        task_data_list = [records.get(task_id) for task_id in tasks]
+    else:
+        task_files = [os.path.join(flow_dir, f"{task_id}.json") for task_id in tasks]
+        if len(task_files) > 1:
+            with ThreadPoolExecutor(max_workers=min(TASK_READ_WORKERS, len(task_files))) as pool:
+                task_data_list = list(pool.map(_read_json, task_files))
+        else:
+            task_data_list = [_read_json(task_file) for task_file in task_files]
+    
     task_details = {}
-    for task_id in tasks:
-        task_file = os.path.join(flow_dir, f"{task_id}.json")
-        if os.path.exists(task_file):
-            with open(task_file, "r") as f:
-                task_data = json.load(f)
-                task_name = task_data.get("name", task_id)
-                task_status = task_data.get("status", "UNKNOWN")
-                task_duration = task_data.get("duration", 0)
-                task_details[task_id] = {
-                    "name": task_name,
-                    "status": task_status,
-                    "duration": task_duration
-                }
+    for task_id, task_data in zip(tasks, task_data_list):
+        if task_data is not None:
+            task_name = task_data.get("name", task_id)
+            task_status = task_data.get("status", "UNKNOWN")
+            task_duration = task_data.get("duration", 0)
+            task_details[task_id] = {
+                "name": task_name,
+                "status": task_status,
+                "duration": task_duration
+            }
+    
+    # Krawędzie zapisane przy wykonaniu przepływu łączą nazwy zadań, a węzły
+    # historii to identyfikatory wywołań ("<funkcja>_<znacznik czasu>");
+    # zadania bez rekordu w historii dostają status UNKNOWN
+    task_ids = {task_id.rsplit("_", 1)[0]: task_id for task_id in task_details}
+    edges = []
+    for source, target in flow_data.get("edges", []):
+        for name in (source, target):
+            if name not in task_ids:
+                task_ids[name] = name
+                task_details[name] = {"name": name, "status": "UNKNOWN", "duration": 0}
+        edges.append((task_ids[source], task_ids[target]))
+    
+    # Do pliku renderuje Graphviz, bez układu liczonego w Pythonie
+    if output_file and GRAPHVIZ_AVAILABLE:
+        nodes = {
+            task_id: {
+                "label": f"{details['name']}\n({details['duration']:.2f}s)",
+                "fillcolor": STATUS_COLORS.get(details["status"], "white")
+            }
+            for task_id, details in task_details.items()
+        }
+        flow_name = flow_data.get("name", flow_id)
+        flow_status = flow_data.get("status", "UNKNOWN")
+        flow_duration = flow_data.get("duration", 0)
+        _render_graphviz(f"Przepływ: {flow_name} (Status: {flow_status}, Czas: {flow_duration:.2f}s)",
+                         nodes, edges, output_file)
+        return
+    
+    # matplotlib i networkx są potrzebne tylko do rysowania na ekranie
+    import matplotlib.pyplot as plt
+    import networkx as nx
+    
+    # Tworzenie grafu
+    G = nx.DiGraph()
     
     # Dodawanie węzłów
     for task_id, details in task_details.items():
         G.add_node(task_id, **details)
     
     # Dodawanie krawędzi na podstawie zależności
-    # TODO: Dodać logikę odtwarzania zależności między zadaniami
+    G.add_edges_from(edges)
     
     # Rysowanie grafu
     plt.figure(figsize=(12, 8))
-    pos = nx.spring_layout(G, seed=42)  # Pozycje węzłów
+    pos = _layered_layout(G)  # Pozycje węzłów
     
     # Kolory węzłów w zależności od statusu
-    color_map = {
-        "COMPLETED": "lightgreen",
-        "FAILED": "lightcoral",
-        "RUNNING": "lightskyblue",
-        "PENDING": "lightgray",
-        "SKIPPED": "lightyellow"
-    }
+    color_map = STATUS_COLORS
     
     # Rysowanie węzłów
     for status in color_map:
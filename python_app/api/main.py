@@ -1,10 +1,13 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel, EmailStr
-from typing import List, Dict, Any, Optional
+from typing import List, Optional
 import os
 import json
+import asyncio
 import datetime
+import time
 import uvicorn
 from dotenv import load_dotenv
 
@@ -16,9 +19,11 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.logger import get_logger
+from utils.http import close_session
 from models.email import Email, EmailAnalysis
 from flows.email_processor import process_email, check_emails
 from flows.llm_service import analyze_email_content
+from flows.email_service import close_mailbox
 
 # Load environment variables
 load_dotenv()
@@ -30,7 +35,9 @@ logger = get_logger(__name__)
 app = FastAPI(
     title="HubMail API",
     description="Email automation system with LLM processing",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes responses (including datetimes) in a single pass
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -42,6 +49,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Log unhandled endpoint errors and return a generic 500 response"""
+    logger.exception("Unhandled error in %s", request.url.path, exc_info=exc)
+    return ORJSONResponse({"detail": "Internal server error"}, status_code=500)
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close the pooled HTTP and IMAP connections"""
+    await close_session()
+    await asyncio.get_running_loop().run_in_executor(None, close_mailbox)
+
 # Models for API requests and responses
 class EmailRequest(BaseModel):
     from_address: EmailStr
@@ -54,70 +73,87 @@ class HealthResponse(BaseModel):
     timestamp: str
     
 class EmailAnalysisResponse(BaseModel):
-    email: Dict[str, Any]
-    analysis: Dict[str, Any]
+    email: Email
+    analysis: EmailAnalysis
+
+# Encoded health payload; the timestamp only needs to be accurate to about
+# a second, so the body is rebuilt at most once per HEALTH_CACHE_TTL
+HEALTH_CACHE_TTL = 1.0
+_health_body = b""
+_health_expires = 0.0
+
+def _health_payload() -> bytes:
+    """Return the encoded health payload, refreshing it when it is stale."""
+    global _health_body, _health_expires
+    now = time.monotonic()
+    if now >= _health_expires:
+        _health_body = json.dumps({
+            "status": "ok",
+            "version": "1.0.0",
+            "timestamp": datetime.datetime.now().isoformat()
+        }).encode()
+        _health_expires = now + HEALTH_CACHE_TTL
+    return _health_body
 
-# Health check endpoint
+# Health check endpoint; the response model documents the payload, while
+# returning a Response skips validating and re-encoding it on every probe
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    return {
-        "status": "ok",
-        "version": "1.0.0",
-        "timestamp": datetime.datetime.now().isoformat()
-    }
+    return Response(content=_health_payload(), media_type="application/json")
 
 # Test email analysis endpoint
 @app.post("/api/test-analysis", response_model=EmailAnalysisResponse)
 async def test_analysis(email_request: EmailRequest):
-    try:
-        # Create email object
-        email = Email(
-            id=f"test-{datetime.datetime.now().timestamp()}",
-            from_address=email_request.from_address,
-            subject=email_request.subject,
-            body=email_request.body,
-            date=datetime.datetime.now()
-        )
-        
-        # Analyze with LLM
-        analysis = await analyze_email_content(email)
-        
-        return {
-            "email": email.dict(),
-            "analysis": analysis.dict()
-        }
-    except Exception as e:
-        logger.error(f"Error in test analysis: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Create email object
+    email = Email(
+        id=f"test-{datetime.datetime.now().timestamp()}",
+        from_address=email_request.from_address,
+        subject=email_request.subject,
+        body=email_request.body,
+        date=datetime.datetime.now()
+    )
+    
+    # Analyze with LLM
+    analysis = await analyze_email_content(email)
+    
+    # Models are serialized once, by alias, at the response boundary
+    return {
+        "email": email,
+        "analysis": analysis
+    }
 
 # Trigger email check
 @app.post("/api/check-emails")
 async def trigger_email_check(background_tasks: BackgroundTasks):
-    try:
-        # Run email check in background
-        background_tasks.add_task(check_emails)
-        
-        return {
-            "status": "processing",
-            "message": "Email check triggered successfully"
-        }
-    except Exception as e:
-        logger.error(f"Error triggering email check: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Run email check in background
+    background_tasks.add_task(check_emails)
+    
+    return {
+        "status": "processing",
+        "message": "Email check triggered successfully"
+    }
 
 # Get recent email analyses
 @app.get("/api/emails")
 async def get_recent_emails(limit: int = 10):
-    try:
-        # This would be implemented to fetch from storage
-        # For now, return a placeholder
-        return {
-            "emails": []
-        }
-    except Exception as e:
-        logger.error(f"Error getting recent emails: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # This would be implemented to fetch from storage
+    # For now, return a placeholder
+    return {
+        "emails": []
+    }
 
 # Start the server if run directly
 if __name__ == "__main__":
-    uvicorn.run("api.main:app", host="0.0.0.0", port=int(os.getenv("API_PORT", 3001)), reload=True)
+    workers = int(os.getenv("API_WORKERS", "1"))
+    # uvloop and httptools replace the default asyncio loop and h11 parser;
+    # uvicorn falls back to those when the packages aren't installed.
+    # Auto-reload only works with a single worker process.
+    uvicorn.run(
+        "api.main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("API_PORT", 3001)),
+        loop="auto",
+        http="auto",
+        workers=workers,
+        reload=workers == 1
+    )
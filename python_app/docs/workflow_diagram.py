@@ -4,10 +4,39 @@ Generate a visual workflow diagram for the HubMail Python application.
 This script creates a visualization of the email processing workflow using Graphviz.
 """
 import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import graphviz
 
+OUTPUT_DIR = 'docs'
+OUTPUT_NAME = 'hubmail_workflow'
+OUTPUT_FORMATS = ('png', 'svg')
+
+def _source_hash() -> str:
+    """Return a short hash of this script, which fully defines the diagram."""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+
+def _is_up_to_date(src_hash: str) -> bool:
+    """Check whether the rendered diagrams were produced from this source."""
+    stamp = Path(OUTPUT_DIR) / f'{OUTPUT_NAME}.stamp'
+    if not stamp.exists() or stamp.read_text().strip() != src_hash:
+        return False
+    return all((Path(OUTPUT_DIR) / f'{OUTPUT_NAME}.{fmt}').exists() for fmt in OUTPUT_FORMATS)
+
+def _render(dot: graphviz.Digraph, fmt: str) -> None:
+    """Render the graph in one format (each call runs its own dot process)."""
+    (Path(OUTPUT_DIR) / f'{OUTPUT_NAME}.{fmt}').write_bytes(dot.pipe(format=fmt))
+
 def create_workflow_diagram():
     """Create a workflow diagram for the email processing pipeline."""
+    # The graph is static, so only re-render when this script changes
+    src_hash = _source_hash()
+    if _is_up_to_date(src_hash):
+        print(f"Workflow diagrams in the '{OUTPUT_DIR}' directory are up to date.")
+        return
+    
     # Create a new directed graph
     dot = graphviz.Digraph(comment='HubMail Email Processing Workflow')
     
@@ -52,13 +81,15 @@ def create_workflow_diagram():
     dot.edge('email_model', 'process', style='dotted')
     dot.edge('analyze', 'analysis_model', style='dotted')
     
-    # Render the graph
-    dot.render('hubmail_workflow', directory='docs', format='png', cleanup=True)
-    dot.render('hubmail_workflow', directory='docs', format='svg', cleanup=True)
+    # Render all formats in parallel; pipe() doesn't share a source file
+    # between the dot processes
+    with ThreadPoolExecutor(max_workers=len(OUTPUT_FORMATS)) as pool:
+        list(pool.map(lambda fmt: _render(dot, fmt), OUTPUT_FORMATS))
     
-    print("Workflow diagrams generated in the 'docs' directory.")
+    (Path(OUTPUT_DIR) / f'{OUTPUT_NAME}.stamp').write_text(src_hash)
+    print(f"Workflow diagrams generated in the '{OUTPUT_DIR}' directory.")
 
 if __name__ == "__main__":
     # Ensure the docs directory exists
-    os.makedirs('docs', exist_ok=True)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     create_workflow_diagram()
@@ -1,30 +1,34 @@
 from prefect import flow, task
-from prefect.task_runners import SequentialTaskRunner
+from prefect.task_runners import ConcurrentTaskRunner
 from typing import List, Dict, Any, Optional
 import asyncio
 import datetime
 import os
-from dotenv import load_dotenv
 
-# Import our modules
-import sys
-import os
-
-# Add the parent directory to sys.path to enable absolute imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# uvloop is optional; the CLI entry point uses it when it is installed
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
 
+# Import our modules; they are resolved from the application root, so run
+# this module as `python -m flows.email_processor` from python_app. The
+# flow services load the .env file when they are imported.
 from models.email import Email, EmailAnalysis
 from utils.logger import get_logger
+from utils.http import close_session
 from flows.llm_service import analyze_email_content
 from flows.notification_service import send_notification
-from flows.email_service import fetch_new_emails, mark_as_seen
-
-# Load environment variables
-load_dotenv()
+from flows.email_service import stream_new_emails, mark_as_seen, close_mailbox
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Maximum number of emails processed at the same time, so the LLM and IMAP
+# endpoints aren't flooded when a large batch arrives
+EMAIL_CONCURRENCY = int(os.getenv("EMAIL_CONCURRENCY", "16"))
+
 @task(name="Process Single Email", retries=2, retry_delay_seconds=5)
 async def process_email(email: Email) -> Dict[str, Any]:
     """
@@ -36,29 +40,32 @@ async def process_email(email: Email) -> Dict[str, Any]:
     Returns:
         Dict containing the email and its analysis
     """
-    logger.info(f"Processing email: {email.id} - {email.subject}")
+    logger.info("Processing email: %s - %s", email.id, email.subject)
     
     try:
         # Analyze email with LLM
         analysis = await analyze_email_content(email)
         
-        # Send notifications based on classification
-        await send_notification(email, analysis)
-        
-        # Mark email as processed
-        await mark_as_seen(email.id)
+        # Send notifications based on classification and mark the email
+        # as processed; neither step depends on the other, so they run
+        # concurrently once the analysis is available
+        await asyncio.gather(
+            send_notification(email, analysis),
+            mark_as_seen(email.id)
+        )
         
-        # Return results
+        # Return results; the models are serialized by whoever
+        # consumes them instead of being converted to dicts here
         return {
-            "email": email.dict(),
-            "analysis": analysis.dict(),
+            "email": email,
+            "analysis": analysis,
             "processed_at": datetime.datetime.now().isoformat()
         }
     except Exception as e:
-        logger.error(f"Error processing email {email.id}: {str(e)}")
+        logger.error("Error processing email %s: %s", email.id, e)
         raise
-        
-@flow(name="Email Processing Flow", task_runner=SequentialTaskRunner())
+    
+@flow(name="Email Processing Flow", task_runner=ConcurrentTaskRunner())
 async def check_emails() -> List[Dict[str, Any]]:
     """
     Main flow to check for new emails and process them
@@ -69,29 +76,50 @@ async def check_emails() -> List[Dict[str, Any]]:
     logger.info("Starting email check flow")
     
     try:
-        # Fetch new emails
-        emails = await fetch_new_emails()
-        logger.info(f"Fetched {len(emails)} new emails")
+        # Start processing each email as soon as it has been fetched; a
+        # failing email doesn't stop the others. While EMAIL_CONCURRENCY
+        # emails are in flight no more are taken from the stream, so the
+        # bounded fetch queue holds the IMAP side back
+        pending = {}
+        in_flight = set()
+        async for email in stream_new_emails():
+            if len(in_flight) >= EMAIL_CONCURRENCY:
+                _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            future = asyncio.ensure_future(process_email(email))
+            pending[future] = email
+            in_flight.add(future)
+        logger.info("Fetched %d new emails", len(pending))
         
-        if not emails:
+        if not pending:
             logger.info("No new emails to process")
             return []
-            
-        # Process each email
+        
+        emails = list(pending.values())
+        outcomes = await asyncio.gather(*pending, return_exceptions=True)
+        
         results = []
-        for email in emails:
-            try:
-                result = await process_email(email)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Failed to process email {email.id}: {str(e)}")
+        for email, outcome in zip(emails, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error("Failed to process email %s: %s", email.id, outcome)
+            else:
+                results.append(outcome)
                 
-        logger.info(f"Processed {len(results)} emails successfully")
+        logger.info("Processed %d emails successfully", len(results))
         return results
     except Exception as e:
-        logger.error(f"Error in email check flow: {str(e)}")
+        logger.error("Error in email check flow: %s", e)
         return []
 
 # For manual testing
+async def main():
+    """Run a single email check and release the pooled connections"""
+    try:
+        await check_emails()
+    finally:
+        await close_session()
+        close_mailbox()
+
 if __name__ == "__main__":
-    asyncio.run(check_emails())
+    if UVLOOP_AVAILABLE:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    asyncio.run(main())
@@ -1,99 +1,266 @@
 from prefect import task
 from imap_tools import MailBox, AND
-from typing import List, Dict, Any, Optional
-import os
-import hashlib
+from typing import AsyncIterator, List, Dict, Any, Optional
+import asyncio
+import threading
+import xxhash
 import datetime
-from dotenv import load_dotenv
 
-import sys
-import os
-
-# Add the parent directory to sys.path to enable absolute imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from models.email import Email
+# Imports are resolved from the application root (python_app), which is on
+# sys.path when the API or flows are started from there
+from models.email import Attachment, Email
 from utils.logger import get_logger
-
-# Load environment variables
-load_dotenv()
+from utils.config import get_email_config
 
 # Initialize logger
 logger = get_logger(__name__)
 
 # Configuration
-EMAIL_SERVER = os.getenv("EMAIL_SERVER", "imap.gmail.com")
-EMAIL_PORT = int(os.getenv("EMAIL_PORT", "993"))
-EMAIL_USER = os.getenv("EMAIL_USER", "")
-EMAIL_PASS = os.getenv("EMAIL_PASS", "")
-EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "true").lower() == "true"
-EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+config = get_email_config()
 
 # Keep track of last fetch time
 last_fetch_time = datetime.datetime.now()
 
-@task(name="Fetch New Emails", retries=2, retry_delay_seconds=10)
-async def fetch_new_emails() -> List[Email]:
+# Logged-in mailbox reused across fetches, so each check doesn't pay for a
+# new TCP/TLS handshake and login; fetches run in worker threads, so access
+# is serialized with a thread lock
+_mailbox: Optional[MailBox] = None
+_mailbox_lock = threading.Lock()
+
+def _get_mailbox() -> MailBox:
     """
-    Fetch new emails from the email server
+    Get the shared mailbox connection, logging in again if it was dropped
+    
+    Must be called with _mailbox_lock held.
     
     Returns:
-        List of Email objects
+        Logged-in MailBox with INBOX selected
+    """
+    global _mailbox
+    if _mailbox is not None:
+        try:
+            # Keep-alive check; also picks up messages that arrived since
+            # the last fetch
+            _mailbox.client.noop()
+            return _mailbox
+        except Exception as e:
+            logger.info(f"Mailbox connection lost, reconnecting: {str(e)}")
+            _drop_mailbox()
+    
+    _mailbox = MailBox(config.server, config.port).login(config.user, config.password, initial_folder='INBOX')
+    return _mailbox
+
+def _drop_mailbox() -> None:
+    """Log out of the shared mailbox connection, if there is one"""
+    global _mailbox
+    mailbox, _mailbox = _mailbox, None
+    if mailbox is not None:
+        try:
+            mailbox.logout()
+        except Exception:
+            # The connection is already broken; nothing left to clean up
+            pass
+
+def close_mailbox() -> None:
+    """Close the shared mailbox connection (on application shutdown)"""
+    with _mailbox_lock:
+        _drop_mailbox()
+
+def _message_to_email(msg) -> Email:
+    """
+    Convert a fetched IMAP message into an Email
+    
+    Args:
+        msg: Message returned by imap_tools
+        
+    Returns:
+        Email object
+    """
+    # Create unique ID; it only deduplicates messages, so a fast
+    # non-cryptographic hash is enough. The raw Date header identifies the
+    # message as well as the parsed date and needs no formatting
+    unique_id = xxhash.xxh3_64_hexdigest(
+        b"%b_%b_%b" % (str(msg.uid).encode(), msg.date_str.encode(), msg.from_.encode())
+    )
+    
+    # Keep only the part of the body that is used; the HTML alternative
+    # isn't used downstream, so it isn't kept either
+    body = msg.text or msg.html
+    
+    # Create Email object
+    return Email(
+        id=unique_id,
+        from_address=msg.from_,
+        to_address=msg.to,
+        subject=msg.subject,
+        body=body[:config.body_limit],
+        body_size=len(body),
+        date=msg.date,
+        has_attachments=bool(msg.attachments),
+        attachments=[
+            Attachment(att.filename, att.content_type, len(att.payload))
+            for att in msg.attachments
+        ]
+    )
+
+def _sender_domain(email: Email) -> str:
+    """
+    Get the sender domain of an email
+    
+    Args:
+        email: The email
+        
+    Returns:
+        Lowercase domain of the sender address
+    """
+    return str(email.from_address).rpartition("@")[2].lower()
+
+def _pop_next_email(emails: List[Email], domain: Optional[str]) -> Email:
+    """
+    Take the next email to hand out, preferring the given sender domain
+    
+    Emails from one domain tend to get similar prompts and classifications,
+    so handing them out together keeps the LLM context warm between
+    consecutive calls. Otherwise emails keep their fetch order.
+    
+    Args:
+        emails: Fetched emails not handed out yet, in fetch order
+        domain: Sender domain of the previously handed out email
+        
+    Returns:
+        The email removed from the list
+    """
+    for index, email in enumerate(emails):
+        if _sender_domain(email) == domain:
+            return emails.pop(index)
+    return emails.pop(0)
+
+async def stream_new_emails() -> AsyncIterator[Email]:
+    """
+    Stream new emails from the email server as they are fetched
+    
+    The blocking IMAP fetch runs in a worker thread and hands over each
+    email as soon as it has been parsed, so callers can start processing
+    before the whole batch has been downloaded. The hand-over queue is
+    bounded, so the fetch waits while the caller is still busy with
+    earlier emails. Among the emails that have already been fetched, mail
+    from the same sender domain as the previous one is handed out first.
+    
+    Yields:
+        Email objects
     """
     global last_fetch_time
     
     logger.info(f"Fetching new emails since {last_fetch_time}")
     
-    if not EMAIL_USER or not EMAIL_PASS:
+    if not config.user or not config.password:
         logger.warning("Email credentials not configured")
-        return []
+        return
     
-    try:
-        # Connect to mailbox
-        with MailBox(EMAIL_SERVER, EMAIL_PORT).login(EMAIL_USER, EMAIL_PASS, initial_folder='INBOX') as mailbox:
-            # Search for unseen emails since last fetch
-            emails = []
-            criteria = AND(seen=False, date_gte=last_fetch_time.date())
-            
-            for msg in mailbox.fetch(criteria, limit=EMAIL_BATCH_SIZE):
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=config.queue_size)
+    done = object()
+    stopped = threading.Event()
+    
+    def put(item) -> None:
+        # Blocks the worker thread until the queue has room; once the caller
+        # has stopped, nothing is handed over any more
+        if not stopped.is_set():
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+    
+    def fetch() -> None:
+        try:
+            with _mailbox_lock:
                 try:
-                    # Create unique ID
-                    unique_id = hashlib.md5(
-                        f"{msg.uid}_{msg.date.isoformat()}_{msg.from_}".encode()
-                    ).hexdigest()
-                    
-                    # Create Email object
-                    email = Email(
-                        id=unique_id,
-                        from_address=msg.from_,
-                        to_address=msg.to,
-                        subject=msg.subject,
-                        body=msg.text or msg.html,
-                        html=msg.html,
-                        date=msg.date,
-                        has_attachments=bool(msg.attachments),
-                        attachments=[
-                            {
-                                "filename": att.filename,
-                                "content_type": att.content_type,
-                                "size": len(att.payload)
-                            }
-                            for att in msg.attachments
-                        ]
-                    )
+                    mailbox = _get_mailbox()
+                    # Search for unseen emails since last fetch
+                    criteria = AND(seen=False, date_gte=last_fetch_time.date())
                     
-                    emails.append(email)
-                except Exception as e:
-                    logger.error(f"Error processing email message: {str(e)}")
+                    # bulk=True fetches all matching UIDs with a single FETCH
+                    # command instead of one round-trip per message; the batch
+                    # size limit keeps the response bounded
+                    for msg in mailbox.fetch(criteria, limit=config.batch_size, bulk=True):
+                        if stopped.is_set():
+                            break
+                        try:
+                            email = _message_to_email(msg)
+                        except Exception as e:
+                            logger.error(f"Error processing email message: {str(e)}")
+                            continue
+                        put(email)
+                except Exception:
+                    # Don't reuse a connection left in an unknown state
+                    _drop_mailbox()
+                    raise
+        finally:
+            put(done)
+    
+    fetcher = loop.run_in_executor(None, fetch)
+    
+    count = 0
+    finished = False
+    # Emails taken off the queue but not handed out yet, in fetch order
+    fetched: List[Email] = []
+    domain = None
+    try:
+        while fetched or not finished:
+            if not fetched:
+                item = await queue.get()
+                if item is done:
+                    finished = True
+                    continue
+                fetched.append(item)
             
-            # Update last fetch time
-            last_fetch_time = datetime.datetime.now()
+            # Also take the emails that have already arrived, without waiting,
+            # so the next one can be picked by sender domain
+            while not finished and len(fetched) < config.queue_size and not queue.empty():
+                item = queue.get_nowait()
+                if item is done:
+                    finished = True
+                else:
+                    fetched.append(item)
             
-            logger.info(f"Fetched {len(emails)} new emails")
-            return emails
+            email = _pop_next_email(fetched, domain)
+            domain = _sender_domain(email)
+            count += 1
+            yield email
+    finally:
+        if not finished:
+            # The caller stopped early (break, aclose() or cancellation);
+            # tell the fetch to stop handing emails over
+            stopped.set()
+        
+        # Keep taking items off the queue until the fetch thread has
+        # returned, so a hand-over it is blocked in completes and the
+        # mailbox lock is always released
+        while not fetcher.done():
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait((getter, fetcher), return_when=asyncio.FIRST_COMPLETED)
+            getter.cancel()
+        
+        if stopped.is_set() and fetcher.exception() is not None:
+            logger.error(f"Error fetching emails: {str(fetcher.exception())}")
+    
+    try:
+        await fetcher
     except Exception as e:
         logger.error(f"Error fetching emails: {str(e)}")
-        return []
+        return
+    
+    # Update last fetch time
+    last_fetch_time = datetime.datetime.now()
+    
+    logger.info(f"Fetched {count} new emails")
+
+@task(name="Fetch New Emails", retries=2, retry_delay_seconds=10)
+async def fetch_new_emails() -> List[Email]:
+    """
+    Fetch new emails from the email server
+    
+    Returns:
+        List of Email objects
+    """
+    return [email async for email in stream_new_emails()]
 
 @task(name="Mark Email as Seen")
 async def mark_as_seen(email_id: str) -> bool:
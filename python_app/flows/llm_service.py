@@ -1,32 +1,52 @@
 from prefect import task
 import aiohttp
+import asyncio
+from aiolimiter import AsyncLimiter
 import json
-import os
-from typing import Dict, Any, Optional
-from dotenv import load_dotenv
-
-import sys
-import os
-
-# Add the parent directory to sys.path to enable absolute imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import re
+import weakref
+from typing import Dict, Any, Optional, Tuple
 
+# Imports are resolved from the application root (python_app), which is on
+# sys.path when the API or flows are started from there
 from models.email import Email, EmailAnalysis, EmailClassification
 from utils.logger import get_logger
-
-# Load environment variables
-load_dotenv()
+from utils.http import get_session
+from utils.llm_cache import InMemoryCache
+from utils.config import get_llm_config
 
 # Initialize logger
 logger = get_logger(__name__)
 
 # Configuration
-OLLAMA_HOST = os.getenv("OLLAMA_HOST", "localhost")
-OLLAMA_PORT = os.getenv("OLLAMA_CONTAINER_PORT", "11434")
-OLLAMA_URL = f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/api/generate"
-LLM_MODEL = os.getenv("LLM_MODEL", "llama2:7b")
-LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.3"))
-LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "2048"))
+config = get_llm_config()
+LLM_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=5)
+
+# Keep the number of in-flight requests within the LLM server's parallel
+# slots and cap the request rate, so large batches queue here instead of
+# overloading the model. asyncio primitives are bound to the loop that first
+# waits on them, and the API server and CLI runs use different loops, so
+# each loop gets its own pair
+_llm_throttles: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[asyncio.Semaphore, AsyncLimiter]]" = weakref.WeakKeyDictionary()
+
+def _get_llm_throttle() -> Tuple[asyncio.Semaphore, AsyncLimiter]:
+    """
+    Get the LLM concurrency and rate limits for the running event loop
+    
+    Returns:
+        Tuple of (semaphore, rate limiter)
+    """
+    loop = asyncio.get_running_loop()
+    throttle = _llm_throttles.get(loop)
+    if throttle is None:
+        throttle = (asyncio.Semaphore(config.max_parallel), AsyncLimiter(config.requests_per_second, 1))
+        _llm_throttles[loop] = throttle
+    return throttle
+
+# Newsletters, automated alerts and repeated threads produce the same prompt
+# over and over; their responses are reused instead of calling the LLM again
+llm_cache = InMemoryCache(max_size=config.cache_size)
+LLM_CACHE_KEY = f"{config.model}:{config.temperature}:{config.max_tokens}"
 
 @task(name="Analyze Email Content", retries=2, retry_delay_seconds=5)
 async def analyze_email_content(email: Email) -> EmailAnalysis:
@@ -41,12 +61,22 @@ async def analyze_email_content(email: Email) -> EmailAnalysis:
     """
     logger.info(f"Analyzing email: {email.id}")
     
+    # Obvious spam is classified by rules, without an LLM call
+    analysis = precheck(email)
+    if analysis is not None:
+        logger.info(f"Email {email.id} classified as {analysis.classification} by precheck")
+        return analysis
+    
     try:
         # Create prompt for LLM
         prompt = create_prompt(email)
         
-        # Call LLM API
-        response = await call_llm_api(prompt)
+        # Call LLM API unless the same prompt was already answered
+        response = await llm_cache.lookup(prompt, LLM_CACHE_KEY)
+        if response is None:
+            response = await call_llm_api(prompt)
+            if response:
+                await llm_cache.update(prompt, LLM_CACHE_KEY, response)
         
         # Parse response
         analysis = parse_llm_response(response)
@@ -55,14 +85,47 @@ async def analyze_email_content(email: Email) -> EmailAnalysis:
         return analysis
     except Exception as e:
         logger.error(f"Error analyzing email {email.id}: {str(e)}")
-        # Return default analysis in case of error
-        return EmailAnalysis(
+        # Return default analysis in case of error; the values are
+        # constants, so validation is skipped
+        return EmailAnalysis.model_construct(
             classification=EmailClassification.BUSINESS,
             confidence=0.5,
             reasoning="Error in analysis, defaulting to business classification",
             suggested_action="Review manually due to analysis error"
         )
 
+# Phrases that mark an email as spam with high confidence on their own;
+# they only match as whole words, so e.g. "specialist" doesn't hit "cialis"
+PRECHECK_SPAM_PHRASES = [
+    "viagra", "cialis", "nigerian prince", "lottery winner", "you have won",
+    "claim your prize", "wire transfer fee",
+]
+_precheck_spam_re = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, PRECHECK_SPAM_PHRASES)) + r")\b", re.IGNORECASE
+)
+
+def precheck(email: Email) -> Optional[EmailAnalysis]:
+    """
+    Classify an email by rules when the signal is strong enough
+    
+    Args:
+        email: The email to analyze
+        
+    Returns:
+        EmailAnalysis object, or None if the email needs the LLM
+    """
+    # Only the part of the body the LLM would see is checked
+    for text in (email.subject, email.from_address, email.body[:1024]):
+        match = _precheck_spam_re.search(text)
+        if match:
+            return EmailAnalysis.model_construct(
+                classification=EmailClassification.SPAM,
+                confidence=0.95,
+                reasoning=f"Contains the spam phrase '{match.group(0).lower()}'",
+                suggested_action="Move to spam folder"
+            )
+    return None
+
 def create_prompt(email: Email) -> str:
     """
     Create a prompt for the LLM
@@ -104,16 +167,17 @@ async def call_llm_api(prompt: str) -> str:
         Raw response from the LLM
     """
     try:
-        async with aiohttp.ClientSession() as session:
-            payload = {
-                "model": LLM_MODEL,
-                "prompt": prompt,
-                "temperature": LLM_TEMPERATURE,
-                "max_tokens": LLM_MAX_TOKENS,
-                "stream": False
-            }
-            
-            async with session.post(OLLAMA_URL, json=payload, timeout=30) as response:
+        payload = {
+            "model": config.model,
+            "prompt": prompt,
+            "temperature": config.temperature,
+            "max_tokens": config.max_tokens,
+            "stream": False
+        }
+        
+        semaphore, limiter = _get_llm_throttle()
+        async with semaphore, limiter:
+            async with get_session().post(config.url, json=payload, timeout=LLM_TIMEOUT) as response:
                 if response.status != 200:
                     error_text = await response.text()
                     raise Exception(f"LLM API error: {response.status} - {error_text}")
@@ -124,6 +188,9 @@ async def call_llm_api(prompt: str) -> str:
         logger.error(f"Error calling LLM API: {str(e)}")
         raise
 
+_json_decoder = json.JSONDecoder()
+_VALID_CLASSIFICATIONS = frozenset(e.value for e in EmailClassification)
+
 def parse_llm_response(response: str) -> EmailAnalysis:
     """
     Parse the LLM response
@@ -135,26 +202,15 @@ def parse_llm_response(response: str) -> EmailAnalysis:
         EmailAnalysis object
     """
     try:
-        # Try to extract JSON from the response
-        json_match = None
-        for line in response.split("\n"):
-            if line.strip().startswith("{") and line.strip().endswith("}"):
-                json_match = line.strip()
-                break
-        
-        if not json_match:
-            # Try to find JSON using regex-like approach
-            start_idx = response.find("{")
-            end_idx = response.rfind("}")
-            if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-                json_match = response[start_idx:end_idx+1]
-        
-        if json_match:
-            data = json.loads(json_match)
+        # Decode the first JSON object in the response in a single pass;
+        # any prose the LLM adds around it is ignored
+        start_idx = response.find("{")
+        if start_idx != -1:
+            data, _ = _json_decoder.raw_decode(response, start_idx)
             
             # Validate classification
             classification = data.get("classification", "BUSINESS").upper()
-            if classification not in [e.value for e in EmailClassification]:
+            if classification not in _VALID_CLASSIFICATIONS:
                 classification = "BUSINESS"
                 
             return EmailAnalysis(
@@ -170,6 +226,27 @@ def parse_llm_response(response: str) -> EmailAnalysis:
         logger.error(f"Error parsing LLM response: {str(e)}")
         return fallback_parsing(response)
 
+# Keyword classes checked by fallback_parsing, highest priority first:
+# (classification, confidence, keywords)
+FALLBACK_KEYWORDS = [
+    (EmailClassification.URGENT, 0.7, ["urgent", "emergency", "critical", "important"]),
+    (EmailClassification.SPAM, 0.7, ["spam", "scam", "phishing", "advertisement"]),
+    (EmailClassification.PERSONAL, 0.6, ["personal", "private", "family", "friend"]),
+]
+
+# All keywords in a single case-insensitive alternation, one named group per class
+_fallback_keyword_re = re.compile(
+    "|".join(
+        f"(?P<{classification.name}>{'|'.join(map(re.escape, keywords))})"
+        for classification, _, keywords in FALLBACK_KEYWORDS
+    ),
+    re.IGNORECASE
+)
+_fallback_priority = {
+    classification.name: priority
+    for priority, (classification, _, _) in enumerate(FALLBACK_KEYWORDS)
+}
+
 def fallback_parsing(response: str) -> EmailAnalysis:
     """
     Fallback parsing when JSON extraction fails
@@ -180,23 +257,22 @@ def fallback_parsing(response: str) -> EmailAnalysis:
     Returns:
         EmailAnalysis object
     """
-    # Simple heuristic-based classification
-    response_lower = response.lower()
-    
+    # Simple heuristic-based classification: scan the response once and keep
+    # the highest-priority class whose keyword appears in it
     classification = EmailClassification.BUSINESS  # Default
     confidence = 0.5
+    best = len(FALLBACK_KEYWORDS)
     
-    if any(word in response_lower for word in ["urgent", "emergency", "critical", "important"]):
-        classification = EmailClassification.URGENT
-        confidence = 0.7
-    elif any(word in response_lower for word in ["spam", "scam", "phishing", "advertisement"]):
-        classification = EmailClassification.SPAM
-        confidence = 0.7
-    elif any(word in response_lower for word in ["personal", "private", "family", "friend"]):
-        classification = EmailClassification.PERSONAL
-        confidence = 0.6
+    for match in _fallback_keyword_re.finditer(response):
+        priority = _fallback_priority[match.lastgroup]
+        if priority < best:
+            best = priority
+            classification, confidence, _ = FALLBACK_KEYWORDS[priority]
+            if priority == 0:
+                break
     
-    return EmailAnalysis(
+    # Built only from the constants above, so validation is skipped
+    return EmailAnalysis.model_construct(
         classification=classification,
         confidence=confidence,
         reasoning="Fallback classification due to parsing error",
@@ -1,28 +1,41 @@
 from prefect import task
 import aiohttp
-import os
-from typing import Dict, Any
-from dotenv import load_dotenv
-
-import sys
-import os
-
-# Add the parent directory to sys.path to enable absolute imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import orjson
+from typing import Awaitable, Callable, Dict, Any
 
+# Imports are resolved from the application root (python_app), which is on
+# sys.path when the API or flows are started from there
 from models.email import Email, EmailAnalysis, EmailClassification
 from utils.logger import get_logger
-
-# Load environment variables
-load_dotenv()
+from utils.http import get_session
+from utils.config import get_notify_config
 
 # Initialize logger
 logger = get_logger(__name__)
 
 # Configuration
-SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL", "")
-SLACK_CHANNEL = os.getenv("SLACK_CHANNEL", "#email-alerts")
-COMPANY_NAME = os.getenv("COMPANY_NAME", "Softreck")
+config = get_notify_config()
+SLACK_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=2)
+SLACK_HEADERS = {"Content-Type": "application/json"}
+
+# Static header blocks shared by every message of a kind; only the fields
+# that depend on the email are built per notification
+_URGENT_HEADER = {
+    "type": "header",
+    "text": {
+        "type": "plain_text",
+        "text": "🚨 URGENT EMAIL ALERT 🚨",
+        "emoji": True
+    }
+}
+_BUSINESS_HEADER = {
+    "type": "header",
+    "text": {
+        "type": "plain_text",
+        "text": "📧 Business Email",
+        "emoji": True
+    }
+}
 
 @task(name="Send Notification")
 async def send_notification(email: Email, analysis: EmailAnalysis) -> bool:
@@ -37,17 +50,11 @@ async def send_notification(email: Email, analysis: EmailAnalysis) -> bool:
         Success status
     """
     try:
-        if analysis.classification == EmailClassification.URGENT:
-            return await send_urgent_alert(email, analysis)
-        elif analysis.classification == EmailClassification.BUSINESS:
-            return await send_business_notification(email, analysis)
-        elif analysis.classification == EmailClassification.SPAM:
-            return await log_spam(email, analysis)
-        elif analysis.classification == EmailClassification.PERSONAL:
-            return await log_personal(email, analysis)
-        else:
+        notifier = NOTIFIERS.get(analysis.classification)
+        if notifier is None:
             logger.info(f"No notification sent for {email.id} with classification {analysis.classification}")
             return True
+        return await notifier(email, analysis)
     except Exception as e:
         logger.error(f"Error sending notification for {email.id}: {str(e)}")
         return False
@@ -64,17 +71,11 @@ async def send_urgent_alert(email: Email, analysis: EmailAnalysis) -> bool:
         Success status
     """
     try:
+        body = email.body if len(email.body) <= 500 else email.body[:500] + "..."
         message = {
             "text": "🚨 URGENT EMAIL ALERT 🚨",
             "blocks": [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "🚨 URGENT EMAIL ALERT 🚨",
-                        "emoji": True
-                    }
-                },
+                _URGENT_HEADER,
                 {
                     "type": "section",
                     "fields": [
@@ -99,7 +100,7 @@ async def send_urgent_alert(email: Email, analysis: EmailAnalysis) -> bool:
                     "type": "section",
                     "text": {
                         "type": "mrkdwn",
-                        "text": f"*Content:*\n{email.body[:500]}{'...' if len(email.body) > 500 else ''}"
+                        "text": f"*Content:*\n{body}"
                     }
                 },
                 {
@@ -140,14 +141,7 @@ async def send_business_notification(email: Email, analysis: EmailAnalysis) -> b
         message = {
             "text": f"📧 Business Email: {email.subject}",
             "blocks": [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": "📧 Business Email",
-                        "emoji": True
-                    }
-                },
+                _BUSINESS_HEADER,
                 {
                     "type": "section",
                     "fields": [
@@ -227,6 +221,15 @@ async def log_personal(email: Email, analysis: EmailAnalysis) -> bool:
         logger.error(f"Error logging personal email for {email.id}: {str(e)}")
         return False
 
+# Notification handler for each classification; classifications without a
+# handler are only logged
+NOTIFIERS: Dict[EmailClassification, Callable[[Email, EmailAnalysis], Awaitable[bool]]] = {
+    EmailClassification.URGENT: send_urgent_alert,
+    EmailClassification.BUSINESS: send_business_notification,
+    EmailClassification.SPAM: log_spam,
+    EmailClassification.PERSONAL: log_personal,
+}
+
 async def send_slack_notification(message: Dict[str, Any]) -> None:
     """
     Send a notification to Slack
@@ -237,21 +240,20 @@ async def send_slack_notification(message: Dict[str, Any]) -> None:
     Raises:
         Exception: If sending fails
     """
-    if not SLACK_WEBHOOK_URL:
+    if not config.slack_webhook_url:
         logger.warning("Slack webhook URL not configured, skipping notification")
         return
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                SLACK_WEBHOOK_URL,
-                json=message,
-                headers={"Content-Type": "application/json"},
-                timeout=5
-            ) as response:
-                if response.status != 200:
-                    text = await response.text()
-                    raise Exception(f"Error sending Slack notification: {response.status} - {text}")
+        async with get_session().post(
+            config.slack_webhook_url,
+            data=orjson.dumps(message),
+            headers=SLACK_HEADERS,
+            timeout=SLACK_TIMEOUT
+        ) as response:
+            if response.status != 200:
+                text = await response.text()
+                raise Exception(f"Error sending Slack notification: {response.status} - {text}")
     except Exception as e:
         logger.error(f"Error sending Slack notification: {str(e)}")
         raise
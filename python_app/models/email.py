@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from typing import List, NamedTuple, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -10,29 +10,29 @@ class EmailClassification(str, Enum):
     SPAM = "SPAM"
     UNKNOWN = "UNKNOWN"
 
+class Attachment(NamedTuple):
+    """Metadata of an email attachment (the payload itself isn't kept)"""
+    filename: str
+    content_type: str
+    size: int
+
 class Email(BaseModel):
     """Email model representing an email message"""
+    # Fields can be populated by name or by alias; dumps use the aliases
+    # ("from"/"to") via model_dump(by_alias=True)
+    model_config = ConfigDict(populate_by_name=True)
+    
     id: str
     from_address: EmailStr = Field(..., alias="from")
     to_address: Optional[str] = Field(None, alias="to")
     subject: str
     body: str
+    # Length of the original body; fetched bodies are stored truncated
+    body_size: int = 0
     html: Optional[str] = None
     date: datetime
     has_attachments: bool = False
-    attachments: List[Dict[str, Any]] = []
-    
-    class Config:
-        allow_population_by_field_name = True
-        
-    def dict(self, *args, **kwargs):
-        """Override dict method to handle the 'from' field correctly"""
-        d = super().dict(*args, **kwargs)
-        if "from_address" in d and kwargs.get("by_alias", False) is False:
-            d["from"] = d.pop("from_address")
-        if "to_address" in d and kwargs.get("by_alias", False) is False:
-            d["to"] = d.pop("to_address")
-        return d
+    attachments: List[Attachment] = []
 
 class EmailAnalysis(BaseModel):
     """Model representing the analysis of an email"""
@@ -0,0 +1,42 @@
+"""
+Shared test doubles for the HubMail tests.
+"""
+import pytest
+
+
+class CallRecorder:
+    """Callable test double that records its calls and returns a canned result."""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class AsyncCallRecorder(CallRecorder):
+    """Awaitable variant of CallRecorder for coroutine functions."""
+
+    async def __call__(self, *args, **kwargs):
+        return CallRecorder.__call__(self, *args, **kwargs)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """
+    Replace a function with a call recorder for the duration of a test.
+
+    Returns a function taking the dotted path of the target, the canned
+    result, an optional exception to raise instead, and whether the target
+    is a coroutine function (the default).
+    """
+    def install(target, result=None, error=None, is_async=True):
+        recorder = (AsyncCallRecorder if is_async else CallRecorder)(result, error)
+        monkeypatch.setattr(target, recorder)
+        return recorder
+    return install
@@ -2,10 +2,10 @@
 """
 Test runner for the HubMail Python application.
 """
-import unittest
 import sys
 import os
-import asyncio
+
+import pytest
 
 # Add the parent directory to sys.path to enable absolute imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,15 +13,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 def run_async_tests():
     """Run all tests, including async tests."""
-    # Discover and run all tests
-    test_loader = unittest.TestLoader()
-    test_suite = test_loader.discover(os.path.dirname(os.path.abspath(__file__)), pattern="test_*.py")
-    
-    # Run the tests
-    test_runner = unittest.TextTestRunner(verbosity=2)
-    result = test_runner.run(test_suite)
-    
-    return result.wasSuccessful()
+    # The async tests are plain coroutine functions run by pytest-asyncio,
+    # which unittest discovery doesn't pick up
+    return pytest.main([os.path.dirname(os.path.abspath(__file__)), "-v"]) == 0
 
 
 if __name__ == "__main__":
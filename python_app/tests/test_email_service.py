@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the email service module.
+"""
+import sys
+import os
+import asyncio
+import contextlib
+import dataclasses
+import datetime
+
+import pytest
+
+# Add the parent directory to sys.path to enable absolute imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.email import Email
+from flows import email_service
+from flows.email_service import stream_new_emails, _pop_next_email, _sender_domain
+
+
+class FakeMailbox:
+    """Mailbox whose fetch returns a fixed list of messages."""
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    def fetch(self, criteria, limit=None, bulk=False):
+        return iter(self.messages[:limit])
+
+
+def make_email(index):
+    """Email standing in for a parsed IMAP message."""
+    return Email.model_construct(
+        id=f"test-{index}",
+        from_address=f"sender{index}@example.com",
+        subject=f"Subject {index}",
+        body="This is a test email body.",
+        date=datetime.datetime.now()
+    )
+
+
+@pytest.fixture
+def mailbox(monkeypatch):
+    """Serve ten messages through the shared mailbox with a one-slot queue."""
+    config = dataclasses.replace(
+        email_service.config, user="user", password="secret", queue_size=1
+    )
+    monkeypatch.setattr(email_service, "config", config)
+    monkeypatch.setattr(email_service, "_get_mailbox", lambda: FakeMailbox(list(range(10))))
+    monkeypatch.setattr(email_service, "_message_to_email", make_email)
+
+
+@pytest.mark.asyncio
+async def test_stream_new_emails_yields_all(mailbox):
+    """Test that every fetched email is streamed."""
+    emails = [email async for email in stream_new_emails()]
+
+    assert [email.id for email in emails] == [f"test-{i}" for i in range(10)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("close", ["break", "aclose"])
+async def test_stream_new_emails_stopped_early(mailbox, close):
+    """Test that stopping the stream early releases the mailbox."""
+    if close == "break":
+        async with contextlib.aclosing(stream_new_emails()) as stream:
+            async for email in stream:
+                break
+    else:
+        stream = stream_new_emails()
+        await stream.__anext__()
+        await stream.aclose()
+
+    # A stuck fetch thread would keep holding the mailbox lock
+    assert email_service._mailbox_lock.acquire(timeout=5)
+    email_service._mailbox_lock.release()
+
+    # The next fetch gets the whole batch
+    emails = await asyncio.wait_for(
+        asyncio.ensure_future(_collect(stream_new_emails())), timeout=5
+    )
+    assert len(emails) == 10
+
+
+async def _collect(stream):
+    """Collect an async stream into a list."""
+    return [email async for email in stream]
+
+
+def test_pop_next_email_prefers_sender_domain():
+    """Test that emails from the previous sender domain are handed out first."""
+    emails = [make_email(0), make_email(1), make_email(2), make_email(3)]
+    emails[0].from_address = "a@one.example"
+    emails[1].from_address = "b@two.example"
+    emails[2].from_address = "c@One.Example"
+    emails[3].from_address = "d@two.example"
+
+    order = []
+    domain = None
+    while emails:
+        email = _pop_next_email(emails, domain)
+        domain = _sender_domain(email)
+        order.append(email.id)
+
+    assert order == ["test-0", "test-2", "test-1", "test-3"]
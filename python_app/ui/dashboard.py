@@ -1,5 +1,6 @@
 import streamlit as st
 import httpx
+import atexit
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -15,6 +16,7 @@ load_dotenv()
 API_HOST = os.getenv("API_HOST", "localhost")
 API_PORT = os.getenv("API_PORT", "3001")
 API_URL = f"http://{API_HOST}:{API_PORT}"
+EMAIL_CHECK_INTERVAL = int(os.getenv("EMAIL_CHECK_INTERVAL", "300"))
 
 # Set page config
 st.set_page_config(
@@ -29,39 +31,62 @@ st.sidebar.title("HubMail Dashboard")
 st.sidebar.info("Email automation system with LLM processing")
 
 # Functions to interact with API
-@st.cache_data(ttl=60)  # Cache for 60 seconds
+@st.cache_resource
+def get_client():
+    """Get the HTTP client shared by all reruns and sessions"""
+    # Keep-alive connections to the API are reused, so a rerun doesn't pay
+    # for a new connection per request
+    client = httpx.Client(
+        base_url=API_URL,
+        timeout=5,
+        limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=15.0)
+    )
+    atexit.register(client.close)
+    return client
+
+@st.cache_data(ttl=60, show_spinner=False)  # Cache for 60 seconds
 def get_health():
     """Get API health status"""
     try:
-        response = httpx.get(f"{API_URL}/health", timeout=5)
+        response = get_client().get("/health")
         return response.json()
     except Exception as e:
         st.error(f"Error connecting to API: {str(e)}")
         return {"status": "error", "version": "unknown", "timestamp": "unknown"}
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+# The list only changes when emails are checked, so it is cached for one
+# check interval
+@st.cache_data(ttl=EMAIL_CHECK_INTERVAL, show_spinner=False, max_entries=4)
 def get_recent_emails():
     """Get recent processed emails"""
     try:
-        response = httpx.get(f"{API_URL}/api/emails", timeout=5)
+        response = get_client().get("/api/emails")
         return response.json().get("emails", [])
     except Exception as e:
         st.error(f"Error fetching emails: {str(e)}")
         return []
 
+# Repeated test runs of the same email reuse the analysis; the number of
+# cached emails is bounded, since every distinct body adds an entry
+@st.cache_data(ttl=600, show_spinner=False, max_entries=32)  # Cache for 10 minutes
+def _analyze_email(from_address, subject, body):
+    """Analyze an email with the API; errors are raised, so they aren't cached"""
+    response = get_client().post(
+        "/api/test-analysis",
+        json={
+            "from_address": from_address,
+            "subject": subject,
+            "body": body
+        },
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()
+
 def test_email_analysis(from_address, subject, body):
     """Test email analysis with the API"""
     try:
-        response = httpx.post(
-            f"{API_URL}/api/test-analysis",
-            json={
-                "from_address": from_address,
-                "subject": subject,
-                "body": body
-            },
-            timeout=10
-        )
-        return response.json()
+        return _analyze_email(from_address, subject, body)
     except Exception as e:
         st.error(f"Error testing email analysis: {str(e)}")
         return None
@@ -69,7 +94,7 @@ def test_email_analysis(from_address, subject, body):
 def trigger_email_check():
     """Trigger email check"""
     try:
-        response = httpx.post(f"{API_URL}/api/check-emails", timeout=5)
+        response = get_client().post("/api/check-emails")
         return response.json()
     except Exception as e:
         st.error(f"Error triggering email check: {str(e)}")
@@ -249,7 +274,7 @@ def main():
         
         settings = {
             "API URL": API_URL,
-            "Email Check Interval": f"{os.getenv('EMAIL_CHECK_INTERVAL', '300')} seconds",
+            "Email Check Interval": f"{EMAIL_CHECK_INTERVAL} seconds",
             "LLM Model": os.getenv("LLM_MODEL", "llama2:7b"),
             "Email Batch Size": os.getenv("EMAIL_BATCH_SIZE", "50")
         }
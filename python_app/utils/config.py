@@ -0,0 +1,99 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+@dataclass(frozen=True, slots=True)
+class EmailConfig:
+    """IMAP connection and fetch settings"""
+    server: str
+    port: int
+    user: str
+    password: str
+    use_ssl: bool
+    batch_size: int
+    # Downstream steps only look at the start of the body (the LLM prompt
+    # uses 1000 characters), so fetched bodies are stored up to this length
+    body_limit: int
+    # Fetched emails buffered ahead of processing before the IMAP fetch waits
+    queue_size: int
+
+@dataclass(frozen=True, slots=True)
+class LLMConfig:
+    """LLM endpoint, sampling and throttling settings"""
+    url: str
+    model: str
+    temperature: float
+    max_tokens: int
+    cache_size: int
+    max_parallel: int
+    requests_per_second: float
+
+@dataclass(frozen=True, slots=True)
+class NotifyConfig:
+    """Slack notification settings"""
+    slack_webhook_url: str
+    slack_channel: str
+    company_name: str
+
+@lru_cache(maxsize=1)
+def _load_env() -> None:
+    """Load the .env file once per process"""
+    load_dotenv()
+
+@lru_cache(maxsize=1)
+def get_email_config() -> EmailConfig:
+    """
+    Get the email settings, parsed once from the environment
+
+    Returns:
+        EmailConfig instance
+    """
+    _load_env()
+    return EmailConfig(
+        server=os.getenv("EMAIL_SERVER", "imap.gmail.com"),
+        port=int(os.getenv("EMAIL_PORT", "993")),
+        user=os.getenv("EMAIL_USER", ""),
+        password=os.getenv("EMAIL_PASS", ""),
+        use_ssl=os.getenv("EMAIL_USE_SSL", "true").lower() == "true",
+        batch_size=int(os.getenv("EMAIL_BATCH_SIZE", "50")),
+        body_limit=int(os.getenv("EMAIL_BODY_LIMIT", "4096")),
+        queue_size=max(2, int(os.getenv("EMAIL_QUEUE_SIZE", "16")))
+    )
+
+@lru_cache(maxsize=1)
+def get_llm_config() -> LLMConfig:
+    """
+    Get the LLM settings, parsed once from the environment
+
+    Returns:
+        LLMConfig instance
+    """
+    _load_env()
+    host = os.getenv("OLLAMA_HOST", "localhost")
+    port = os.getenv("OLLAMA_CONTAINER_PORT", "11434")
+    return LLMConfig(
+        url=f"http://{host}:{port}/api/generate",
+        model=os.getenv("LLM_MODEL", "llama2:7b"),
+        temperature=float(os.getenv("LLM_TEMPERATURE", "0.3")),
+        max_tokens=int(os.getenv("LLM_MAX_TOKENS", "2048")),
+        cache_size=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+        max_parallel=int(os.getenv("LLM_MAX_PARALLEL", "4")),
+        requests_per_second=float(os.getenv("LLM_RPS", "10"))
+    )
+
+@lru_cache(maxsize=1)
+def get_notify_config() -> NotifyConfig:
+    """
+    Get the notification settings, parsed once from the environment
+
+    Returns:
+        NotifyConfig instance
+    """
+    _load_env()
+    return NotifyConfig(
+        slack_webhook_url=os.getenv("SLACK_WEBHOOK_URL", ""),
+        slack_channel=os.getenv("SLACK_CHANNEL", "#email-alerts"),
+        company_name=os.getenv("COMPANY_NAME", "Softreck")
+    )
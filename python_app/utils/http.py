@@ -0,0 +1,50 @@
+import asyncio
+import weakref
+from typing import Optional
+
+import aiohttp
+
+# Connection pool settings shared by all outgoing HTTP calls
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_CONNECTIONS_PER_HOST = 32
+HTTP_KEEPALIVE_TIMEOUT = 75
+HTTP_DNS_CACHE_TTL = 300
+
+# One session per event loop: aiohttp sessions are bound to the loop they
+# were created in, and the API server and CLI runs use different loops
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Get the shared HTTP session for the running event loop
+
+    The session keeps connections alive between calls, so repeated requests
+    to the same host skip the TCP and TLS setup.
+
+    Returns:
+        Shared aiohttp client session
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=HTTP_MAX_CONNECTIONS,
+                limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL
+            )
+        )
+        _sessions[loop] = session
+    return session
+
+async def close_session(loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+    """
+    Close the shared HTTP session of an event loop
+
+    Args:
+        loop: Event loop whose session to close (default: the running loop)
+    """
+    session = _sessions.pop(loop or asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
@@ -0,0 +1,77 @@
+import hashlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+class LLMCache(ABC):
+    """Base class for caches of raw LLM responses"""
+
+    @staticmethod
+    def make_key(prompt: str, model_key: str) -> str:
+        """
+        Build the cache key for a prompt
+
+        Args:
+            prompt: Prompt sent to the LLM
+            model_key: Model name and sampling settings the response depends on
+
+        Returns:
+            Hex digest identifying the prompt and model
+        """
+        # Whitespace differences don't change the answer, so they shouldn't
+        # cause a cache miss either
+        normalized = " ".join(prompt.split())
+        return hashlib.blake2b(
+            f"{model_key}\0{normalized}".encode(), digest_size=16
+        ).hexdigest()
+
+    @abstractmethod
+    async def lookup(self, prompt: str, model_key: str) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            prompt: Prompt sent to the LLM
+            model_key: Model name and sampling settings
+
+        Returns:
+            Cached response or None on a miss
+        """
+
+    @abstractmethod
+    async def update(self, prompt: str, model_key: str, response: str) -> None:
+        """
+        Store a response
+
+        Args:
+            prompt: Prompt sent to the LLM
+            model_key: Model name and sampling settings
+            response: Raw LLM response
+        """
+
+class InMemoryCache(LLMCache):
+    """LRU cache of LLM responses kept in process memory"""
+
+    def __init__(self, max_size: int = 1024):
+        """
+        Args:
+            max_size: Maximum number of cached responses
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    async def lookup(self, prompt: str, model_key: str) -> Optional[str]:
+        key = self.make_key(prompt, model_key)
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        return response
+
+    async def update(self, prompt: str, model_key: str, response: str) -> None:
+        if self.max_size <= 0:
+            return
+        key = self.make_key(prompt, model_key)
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)